@@ -0,0 +1,177 @@
+"""
+On-disk cache of assets already converted for this display and mixer.
+
+Surfaces are stored as their raw pixel buffers and sounds as raw samples at
+the mixer's rate, so a warm start only has to map a file and copy it into
+place instead of decoding PNG and WAV files.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+
+import pygame
+
+
+# Bump when the layout or content of cached data changes
+CACHE_VERSION = 2
+
+
+def surface_format(surface):
+    """Returns a string describing a surface's pixel format."""
+    return "{}:{}:{}:{}:{}".format(
+        surface.get_bitsize(), surface.get_bytesize(),
+        ",".join(str(mask) for mask in surface.get_masks()),
+        surface.get_flags() & pygame.SRCALPHA, surface.get_pitch())
+
+
+class AssetCache:
+    """
+    Stores blobs in cache_dir keyed by the content of their source files.
+
+    Each source file's SHA-1 is remembered with its mtime and size, so it is
+    only re-hashed when the file changes on disk. Entries are looked up by
+    name and are rebuilt whenever the key built from their sources and the
+    target format no longer matches.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.sources = {}
+        self.entries = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._maps = []
+        try:
+            with open(self.index_path) as index_file:
+                index = json.load(index_file)
+            if index.get("version") == CACHE_VERSION:
+                self.sources = index["sources"]
+                self.entries = index["entries"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def file_hash(self, path):
+        """Returns the SHA-1 of a file, reusing the stored one if it has not changed."""
+        stat = os.stat(path)
+        known = self.sources.get(path)
+        if known and known[0] == stat.st_mtime_ns and known[1] == stat.st_size:
+            return known[2]
+        digest = hashlib.sha1()
+        with open(path, "rb") as source:
+            for chunk in iter(lambda: source.read(1 << 20), b""):
+                digest.update(chunk)
+        self.sources[path] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+        self.dirty = True
+        return digest.hexdigest()
+
+    def key(self, paths, target):
+        """Builds an entry key from source files and a target format string."""
+        digest = hashlib.sha1(f"{CACHE_VERSION}|{target}".encode())
+        for path in paths:
+            digest.update(self.file_hash(path).encode())
+        return digest.hexdigest()
+
+    def load(self, name, key):
+        """
+        Returns (data, meta) for a cached entry, where data is a read-only
+        memory map of the blob, or None if the entry is missing or stale.
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry["key"] != key:
+            self.misses += 1
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, entry["file"]), "rb") as blob:
+                data = mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if len(data) != entry["length"]:
+            data.close()
+            self.misses += 1
+            return None
+        self._maps.append(data)
+        self.hits += 1
+        return data, entry["meta"]
+
+    def store(self, name, key, data, meta):
+        """
+        Writes a blob and records it in the index. The blob is written to a
+        temporary file and moved into place, so another process mapping it
+        never sees it half written.
+        """
+        filename = f"{name}.bin"
+        path = os.path.join(self.cache_dir, filename)
+        temp_path = _temp_path(path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, "wb") as blob:
+                blob.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            _discard(temp_path)
+            return
+        self.entries[name] = {"key": key, "file": filename, "length": len(data), "meta": meta}
+        self.dirty = True
+
+    def save(self):
+        """Writes the index back to disk if anything changed."""
+        if not self.dirty:
+            return
+        index = {"version": CACHE_VERSION, "sources": self.sources, "entries": self.entries}
+        temp_path = _temp_path(self.index_path)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_path, "w") as index_file:
+                json.dump(index, index_file)
+            os.replace(temp_path, self.index_path)
+            self.dirty = False
+        except OSError:
+            _discard(temp_path)
+
+    def close(self):
+        """Releases the memory maps handed out by load."""
+        for data in self._maps:
+            data.close()
+        self._maps = []
+
+    def load_surface(self, name, key, make_blank):
+        """
+        Rebuilds a surface from a cached pixel buffer. make_blank(size) must
+        return a new surface in the target format, which is filled in place.
+        Returns (surface, meta) or None if the entry is missing, stale or was
+        stored for a different pixel layout.
+        """
+        cached = self.load(name, key)
+        if cached is None:
+            return None
+        data, meta = cached
+        surface = make_blank(tuple(meta["size"]))
+        if meta["format"] != surface_format(surface):
+            return None
+        pixels = memoryview(surface.get_view("0")).cast("B")
+        pixels[:] = data
+        pixels.release()
+        return surface, meta
+
+    def store_surface(self, name, key, surface, meta):
+        """Stores a surface's raw pixel buffer along with its size and format."""
+        meta = dict(meta, size=list(surface.get_size()), format=surface_format(surface))
+        self.store(name, key, surface.get_buffer().raw, meta)
+
+
+def _temp_path(path):
+    """Returns a temporary name next to path that no other process will use."""
+    return f"{path}.{os.getpid()}.tmp"
+
+
+def _discard(path):
+    """Removes a leftover temporary file, if there is one."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
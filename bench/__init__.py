@@ -0,0 +1,5 @@
+"""
+Scenario-based frame cost benchmarks.
+
+Run with ``python -m bench`` from the game folder; see ``python -m bench --help``.
+"""
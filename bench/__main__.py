@@ -0,0 +1,60 @@
+"""
+Command-line entry point: python -m bench
+"""
+
+import argparse
+import sys
+
+from bench import runner
+from bench.scenarios import SCENARIOS, find
+
+
+def parse_args():
+    """Parses command-line options."""
+    parser = argparse.ArgumentParser(prog="python -m bench",
+                                     description="Freighter frame cost benchmarks")
+    parser.add_argument("scenarios", nargs="*",
+                        help="scenarios to run (default: all); see --list")
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    parser.add_argument("--frames", type=int, default=600, help="frames per scenario")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for every scenario")
+    parser.add_argument("--out", default="bench/results.json", help="where to save results")
+    parser.add_argument("--baseline", default=None,
+                        help="results file to compare against; exit 1 on regressions")
+    parser.add_argument("--margin", type=float, default=0.25,
+                        help="allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--floor", type=float, default=0.05,
+                        help="ignore timings under this many milliseconds when comparing")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        width = max(len(scenario.name) for scenario in SCENARIOS)
+        for scenario in SCENARIOS:
+            print(f"{scenario.name:<{width}}  {scenario.description}")
+        return 0
+
+    scenarios = [find(name) for name in args.scenarios] if args.scenarios else SCENARIOS
+    results = {}
+    for scenario in scenarios:
+        print(f"running {scenario.name} ({scenario.description})", flush=True)
+        results[scenario.name] = runner.run_scenario(scenario, args.frames, args.seed)
+    print(runner.format_results(results))
+    runner.save(results, args.out)
+    print(f"saved {args.out}")
+
+    if args.baseline:
+        regressions = runner.compare(results, runner.load(args.baseline), args.margin, args.floor)
+        if regressions:
+            print(f"regressions against {args.baseline}:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print(f"no regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Runs benchmark scenarios and compares their timings with a baseline.
+"""
+
+import json
+import os
+import time
+
+# Benchmarks never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import config
+from game import Game
+
+
+# Phases reported for every scenario
+PHASES = ("run_rocks", "run_lasers", "run_particles", "render", "flip", "frame")
+
+# Percentiles reported for every phase
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, pct):
+    """Returns the nearest-rank percentile of a sorted list."""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, round(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def summarize(samples):
+    """Turns per-frame millisecond samples into percentiles per phase."""
+    summary = {}
+    for phase, values in samples.items():
+        values = sorted(values)
+        summary[phase] = {f"p{pct}": round(percentile(values, pct), 4) for pct in PERCENTILES}
+    return summary
+
+
+def timed(method, times, phase):
+    """Wraps a game method so each call adds its duration to times[phase]."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            times[phase] += (time.perf_counter() - start) * 1000
+    return wrapper
+
+
+def run_scenario(scenario, frames, seed=1):
+    """
+    Builds a windowless game for a scenario and runs it for the given number
+    of frames: one simulation tick, a full draw and a flip each. Returns the
+    per-phase percentiles plus entity counts at the end.
+    """
+    saved = {name: getattr(config, name) for name in scenario.settings}
+    for name, value in scenario.settings.items():
+        setattr(config, name, value)
+    try:
+        game = Game(headless=True, seed=seed)
+        game.loads.wait_for_audio()
+        if scenario.setup is not None:
+            scenario.setup(game)
+
+        times = dict.fromkeys(PHASES, 0.0)
+        samples = {phase: [] for phase in PHASES}
+        game.run_rocks = timed(game.run_rocks, times, "run_rocks")
+        game.run_lasers = timed(game.run_lasers, times, "run_lasers")
+        game.run_particles = timed(game.run_particles, times, "run_particles")
+
+        for frame in range(frames):
+            for phase in PHASES:
+                times[phase] = 0.0
+            pygame.event.pump()
+            if scenario.drive is not None:
+                scenario.drive(game, frame)
+
+            frame_start = time.perf_counter()
+            game.tick()
+            game.voices.flush()
+            render_start = time.perf_counter()
+            game.draw()
+            flip_start = time.perf_counter()
+            pygame.display.flip()
+            end = time.perf_counter()
+
+            times["render"] = (flip_start - render_start) * 1000
+            times["flip"] = (end - flip_start) * 1000
+            times["frame"] = (end - frame_start) * 1000
+            for phase in PHASES:
+                samples[phase].append(times[phase])
+
+        result = {
+            "description": scenario.description,
+            "frames": frames,
+            "window": list(game.window.get_size()),
+            "level": game.level,
+            "rocks": len(game.rockbox),
+            "particles": game.particles.count if game.particles is not None else 0,
+            "phases": summarize(samples),
+        }
+        pygame.quit()
+        return result
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def compare(results, baseline, margin, floor):
+    """
+    Returns a list of regressions: phases whose p50 or p95 exceeds the
+    baseline's by more than margin (a fraction). Timings below floor
+    milliseconds in both runs are too small to compare and are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for phase, stats in result["phases"].items():
+            base_stats = base["phases"].get(phase)
+            if base_stats is None:
+                continue
+            for key in ("p50", "p95"):
+                now, before = stats[key], base_stats[key]
+                if max(now, before) < floor:
+                    continue
+                if now > before * (1 + margin):
+                    regressions.append(f"{name} {phase} {key}: {now:.3f} ms vs baseline {before:.3f} ms")
+    return regressions
+
+
+def format_results(results):
+    """Returns the results as a printable table."""
+    lines = [f"{'scenario':<16} {'phase':<13} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES)]
+    for name, result in results.items():
+        for phase, stats in result["phases"].items():
+            lines.append(f"{name:<16} {phase:<13} " +
+                         " ".join(f"{stats['p' + str(p)]:8.3f}" for p in PERCENTILES))
+    return "\n".join(lines)
+
+
+def save(results, path):
+    """Writes results as JSON."""
+    with open(path, "w") as out:
+        json.dump(results, out, indent=2)
+
+
+def load(path):
+    """Reads results written by save."""
+    with open(path) as source:
+        return json.load(source)
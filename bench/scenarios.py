@@ -0,0 +1,123 @@
+"""
+Scripted benchmark scenarios.
+
+Each scenario sets the config values it needs before the game is built, then
+sets up the game and drives it once per frame.
+"""
+
+from funcs import rand_int, SMALL, LARGE
+
+
+class Scenario:
+    """
+    A named benchmark run.
+
+    settings holds config overrides applied before Game is built, setup(game)
+    runs once after it is built, and drive(game, frame) runs before each
+    frame's simulation tick.
+    """
+
+    def __init__(self, name, description, settings=None, setup=None, drive=None):
+        self.name = name
+        self.description = description
+        self.settings = settings or {}
+        self.setup = setup
+        self.drive = drive
+
+
+def start_level(level):
+    """Returns a setup function that starts the given level."""
+    def setup(game):
+        game.level = level
+        game.level_setup()
+    return setup
+
+
+def fill_rocks(game, count):
+    """Adds rocks at random on-screen positions until there are count of them."""
+    game.total_rocks = count
+    window_width = game.window.get_width()
+    window_height = game.window.get_height()
+    while len(game.rockbox) < count:
+        rock = game.new_rock(rand_int(SMALL, LARGE, game.rng))
+        rock.set_position(
+            rand_int(0, window_width - rock.rect.width, game.rng),
+            rand_int(0, window_height - (rock.rect.height + game.freighter.rect.height + 10), game.rng)
+        )
+        game.add_rock(rock)
+
+
+def setup_rock_field(game):
+    """Starts level 1 with 500 rocks in play."""
+    fill_rocks(game, 500)
+
+
+def setup_rock_swarm(game):
+    """Starts level 1 with 3000 rocks in play."""
+    fill_rocks(game, 3000)
+
+
+def drive_laser_fire(game, frame):
+    """Sweeps the freighter side to side, firing as fast as the cooldown allows."""
+    freighter = game.freighter
+    freighter.hp = freighter.max_hp
+    freighter.x_velocity = freighter.x_speed if (frame // 120) % 2 else -freighter.x_speed
+    game.shoot_laser()
+
+
+def drive_particle_storm(game, frame):
+    """Sets off explosions across the field every frame, keeping over 10k particles alive."""
+    if game.particles is None:
+        return
+    window_width = game.window.get_width()
+    window_height = game.window.get_height()
+    for _ in range(4):
+        game.emit_particles(LARGE, rand_int(0, window_width, game.rng), rand_int(0, window_height, game.rng))
+
+
+def setup_win_cascade(game):
+    """Starts level 10 with every crate collected, so the win cascade runs."""
+    start_level(10)(game)
+    for crate in game.cratebox:
+        crate.alive = False
+
+
+# Collision by rect only, to measure what pixel-accurate collision costs
+RECT_COLLISION = {"PIXEL_COLLISION": False}
+
+# Rocks moved and bounced in bulk by the NumPy rock engine
+ROCK_ENGINE = {"USE_ROCK_ENGINE": True}
+
+# Playfield and window both at 3840x2160
+UHD = {"WINDOW_WIDTH": 3840, "WINDOW_HEIGHT": 2160, "LOGICAL_RESOLUTION": (3840, 2160)}
+
+
+SCENARIOS = [
+    Scenario("zone1", "level 1 at 1440x900", setup=start_level(1)),
+    Scenario("zone10", "level 10 at 1440x900", setup=start_level(10)),
+    Scenario("zone1_4k", "level 1 at 3840x2160",
+             settings=UHD, setup=start_level(1)),
+    Scenario("zone10_4k", "level 10 at 3840x2160",
+             settings=UHD, setup=start_level(10)),
+    Scenario("rock_field", "500 rocks at 1440x900", setup=setup_rock_field),
+    Scenario("rock_swarm", "3000 rocks through the rock engine",
+             settings=ROCK_ENGINE, setup=setup_rock_swarm),
+    Scenario("laser_fire", "sustained laser fire at level 10",
+             setup=start_level(10), drive=drive_laser_fire),
+    Scenario("zone10_rects", "zone10 colliding by rect only",
+             settings=RECT_COLLISION, setup=start_level(10)),
+    Scenario("laser_fire_rects", "laser_fire colliding by rect only",
+             settings=RECT_COLLISION, setup=start_level(10), drive=drive_laser_fire),
+    Scenario("particles", "four explosions' particles a frame at level 10",
+             setup=start_level(10), drive=drive_particle_storm),
+    Scenario("win_cascade", "level 10 won, rocks blown up one by one",
+             setup=setup_win_cascade),
+]
+
+
+def find(name):
+    """Returns the scenario with the given name."""
+    for scenario in SCENARIOS:
+        if scenario.name == name:
+            return scenario
+    raise KeyError(name)
@@ -12,8 +12,15 @@ class Boom(SubSprite):
     Explosion animation that appears when rocks or the ship are destroyed.
     """
     
+    __slots__ = ("boom_time",)
+    
     def __init__(self, game, size, sprite_rect):
         super().__init__()
+        self.reset(game, size, sprite_rect)
+    
+    def reset(self, game, size, sprite_rect):
+        """Sets the explosion up over a new sprite, so a pooled one can be reused."""
+        self.reset_sprite()
         self.set_game(game)
         
         self.boom_time = game.get_time()
@@ -25,7 +32,7 @@ class Boom(SubSprite):
         else:
             self.image = game.get_loads().tex_sm_explode
         
-        self.rect = self.image.get_rect()
+        self.rect.size = self.image.get_size()
         
         # Position at center of destroyed sprite
         sprite_center_x = sprite_rect.x + sprite_rect.width // 2
@@ -36,9 +43,7 @@ class Boom(SubSprite):
         )
         
         # Play explosion sound
-        sound = game.get_loads().boom_buffer
-        sound.set_volume(config.SOUND_BOOM_VOLUME)
-        sound.play()
+        game.play_sound(game.get_loads().boom_buffer, "boom", config.SOUND_BOOM_VOLUME)
     
     def update(self):
         """Update explosion animation and remove when finished."""
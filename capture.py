@@ -0,0 +1,187 @@
+"""
+Gameplay frame capture.
+
+After each present the game copies the display surface's pixels into a free
+slot of a preallocated ring; a writer thread compresses full slots with zlib
+(or stores them raw) and appends them to a capture file, then hands the slot
+back. The game loop only ever pays for that one copy: when every slot is
+still waiting to be written, the frame is dropped and counted instead, and
+the writer reports the drops from its own thread.
+
+File layout (little-endian):
+    header  magic "FRCP", version u16, width u16, height u16, pitch u32,
+            bytes per pixel u8, zlib level u8 (0 for raw pixels),
+            red, green, blue and alpha masks u32, tick rate u16
+    frames  frame number u32, simulation tick u32, seconds since capture
+            started f64, input-to-present latency ms f32, pixel data
+            length u32, then the pixel data (pitch * height bytes once
+            decompressed)
+
+Dropped frames show up as gaps in the frame numbers.
+"""
+
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import pygame
+
+
+MAGIC = b"FRCP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHIBB4IH")
+FRAME = struct.Struct("<IIdfI")
+
+# Shortest time between two reports of dropped frames (seconds)
+DROP_REPORT_INTERVAL = 1.0
+
+
+class CaptureHeader:
+    """Size and pixel layout of every frame in a capture."""
+
+    def __init__(self, width, height, pitch, bytesize, level, masks, tick_rate):
+        self.width = width
+        self.height = height
+        self.pitch = pitch
+        self.bytesize = bytesize
+        self.level = level
+        self.masks = masks
+        self.tick_rate = tick_rate
+
+
+class CapturedFrame:
+    """One frame read back from a capture file."""
+
+    def __init__(self, header, frame, tick, seconds, latency, pixels):
+        self.header = header
+        self.frame = frame
+        self.tick = tick
+        self.seconds = seconds
+        self.latency = latency
+        self.pixels = pixels
+
+    def surface(self):
+        """Returns the frame as a new Surface in its captured pixel format."""
+        header = self.header
+        surface = pygame.Surface((header.width, header.height), 0,
+                                 header.bytesize * 8, header.masks)
+        surface.get_buffer().write(self.pixels)
+        return surface
+
+
+class FrameCapture:
+    """
+    Copies frames of a surface into a ring of ring_size buffers and writes
+    them to path on a background thread. level is the zlib compression
+    level, 0 to store raw pixels.
+    """
+
+    def __init__(self, path, surface, ring_size, level, tick_rate):
+        self.header = CaptureHeader(surface.get_width(), surface.get_height(), surface.get_pitch(),
+                                    surface.get_bytesize(), level, surface.get_masks(), tick_rate)
+        self.file = open(path, "wb")
+        header = self.header
+        self.file.write(HEADER.pack(MAGIC, VERSION, header.width, header.height, header.pitch,
+                                    header.bytesize, level, *header.masks, tick_rate))
+        self.path = path
+        self.ring = [bytearray(header.pitch * header.height) for _ in range(ring_size)]
+        self.free = queue.SimpleQueue()
+        for slot in range(ring_size):
+            self.free.put(slot)
+        self.full = queue.SimpleQueue()
+        self.start = time.perf_counter()
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.reported_drops = 0
+        self.last_report = 0.0
+        self.thread = threading.Thread(target=self._write_frames, name="frame-capture", daemon=True)
+        self.thread.start()
+
+    def grab(self, surface, frame, tick, latency):
+        """
+        Queues a copy of surface's pixels for writing. Returns False, and
+        counts the frame as dropped, if every buffer is still in use.
+        """
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        memoryview(self.ring[slot])[:] = surface.get_buffer()
+        self.full.put((slot, frame, tick, time.perf_counter() - self.start, latency))
+        self.captured += 1
+        return True
+
+    def _write_frames(self):
+        """Writer thread: drains full buffers to the file until close queues None."""
+        while True:
+            item = self.full.get()
+            if item is None:
+                break
+            slot, frame, tick, seconds, latency = item
+            pixels = self.ring[slot]
+            if self.header.level:
+                # zlib lets go of the GIL while it works
+                pixels = zlib.compress(pixels, self.header.level)
+                self.free.put(slot)
+            self.file.write(FRAME.pack(frame, tick, seconds, latency, len(pixels)))
+            self.file.write(pixels)
+            if not self.header.level:
+                self.free.put(slot)
+            self.written += 1
+
+            self._report_drops()
+        self._report_drops(final=True)
+
+    def _report_drops(self, final=False):
+        """Prints the frames dropped since the last report, at most once per interval."""
+        dropped = self.dropped
+        now = time.perf_counter()
+        if dropped == self.reported_drops or (not final and now - self.last_report < DROP_REPORT_INTERVAL):
+            return
+        print(f"Capture writer behind: dropped {dropped - self.reported_drops} frames "
+              f"({dropped} in total)")
+        self.reported_drops = dropped
+        self.last_report = now
+
+    def close(self):
+        """Writes out the frames still queued and closes the file."""
+        if self.file.closed:
+            return
+        self.full.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def format(self):
+        """Returns a one-line summary."""
+        return (f"Captured {self.written} frames to {self.path}, "
+                f"dropped {self.dropped} while the writer was behind")
+
+
+def read_capture(path):
+    """Yields every frame of a capture file as a CapturedFrame."""
+    with open(path, "rb") as source:
+        data = source.read(HEADER.size)
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a frame capture")
+        magic, version, width, height, pitch, bytesize, level, *rest = HEADER.unpack(data)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame capture")
+        if version != VERSION:
+            raise ValueError(f"{path} is capture version {version}, expected {VERSION}")
+        header = CaptureHeader(width, height, pitch, bytesize, level, tuple(rest[:4]), rest[4])
+        while True:
+            data = source.read(FRAME.size)
+            if len(data) < FRAME.size:
+                # End of file, or a capture cut short mid-frame
+                return
+            frame, tick, seconds, latency, length = FRAME.unpack(data)
+            pixels = source.read(length)
+            if len(pixels) < length:
+                return
+            if level:
+                pixels = zlib.decompress(pixels)
+            yield CapturedFrame(header, frame, tick, seconds, latency, pixels)
@@ -15,6 +15,27 @@ WINDOW_BITS_PER_PIXEL = 32
 # Try fullscreen mode (True) or use windowed mode (False)
 USE_FULLSCREEN = True
 
+# Playfield size the game is simulated and drawn at, then scaled to fit the
+# display once per frame. None simulates and draws at the display's own size
+LOGICAL_RESOLUTION = (1440, 900)
+
+# How the playfield is scaled to the display:
+# "scaled" lets SDL scale it when presenting (the pygame.SCALED flag),
+# "smoothscale" draws offscreen and scales with one smoothscale per frame
+SCALE_MODE = "scaled"
+
+# Derive the number of rocks from the physical display size (True) rather
+# than from the playfield size (False)
+ROCKS_FROM_DISPLAY_SIZE = False
+
+# Redraw and update only the regions that changed each frame (True)
+# or clear and flip the whole window (False)
+USE_DIRTY_RECTS = True
+
+# Fall back to a full flip when the changed area is more than this
+# fraction of the window
+DIRTY_RECT_MAX_FRACTION = 0.4
+
 
 # ============================================================================
 # FREIGHTER (PLAYER SHIP) SETTINGS
@@ -93,6 +114,11 @@ ROCK_LARGE_Y_SPEED = 1
 # Rock movement calculation base (used in move_interval calculation)
 ROCK_MOVE_BASE = 300
 
+# Move, bounce and draw all rocks in bulk with NumPy arrays (True)
+# or update each rock object on its own (False)
+# Needs numpy installed; falls back to per-rock updates without it
+USE_ROCK_ENGINE = False
+
 
 # ============================================================================
 # EXPLOSION SETTINGS
@@ -102,6 +128,39 @@ ROCK_MOVE_BASE = 300
 EXPLOSION_DURATION = 150
 
 
+# ============================================================================
+# PARTICLE SETTINGS
+# ============================================================================
+
+# Throw out spark and debris particles from explosions (True)
+# Needs numpy installed; explosions are just the sprite without it
+USE_PARTICLES = True
+
+# Most particles alive at once; bursts past this are cut short
+PARTICLE_CAPACITY = 32768
+
+# Side of the square each particle is drawn as (pixels)
+PARTICLE_SIZE = 2
+
+# Particles per explosion: (large explosion, small explosion)
+BOOM_SPARKS = (90, 30)
+BOOM_DEBRIS = (60, 20)
+
+# Speed range (pixels per second) and lifetime range (milliseconds)
+SPARK_SPEED = (120, 420)
+SPARK_LIFE = (200, 550)
+DEBRIS_SPEED = (30, 140)
+DEBRIS_LIFE = (600, 1300)
+
+# Colours each particle is picked from; particles fade to black as they age
+SPARK_COLORS = ((255, 255, 200), (255, 210, 90), (255, 140, 40))
+DEBRIS_COLORS = ((150, 130, 110), (110, 100, 90), (180, 170, 160))
+
+# Downward pull (pixels per second squared) and fraction of speed kept per second
+PARTICLE_GRAVITY = 220
+PARTICLE_DRAG = 0.35
+
+
 # ============================================================================
 # FORCE FIELD SETTINGS
 # ============================================================================
@@ -126,6 +185,73 @@ AREA_MODIFIER_DIVISOR = 250.0
 LEVEL_WIN_ROCK_DESTROY_DELAY = 100
 
 
+# ============================================================================
+# COLLISION SETTINGS
+# ============================================================================
+
+# Test the opaque pixels of sprites whose rects overlap (True), so the
+# transparent corners of rocks, crates and the freighter no longer count as hits
+# Rocks still bounce off each other by rect
+PIXEL_COLLISION = True
+
+
+# ============================================================================
+# HUD SETTINGS
+# ============================================================================
+
+# Most rendered text surfaces kept for reuse
+TEXT_CACHE_SIZE = 128
+
+
+# ============================================================================
+# PROFILER SETTINGS
+# ============================================================================
+
+# Frames of timings kept for the overlay graph and CSV export
+PROFILER_HISTORY = 600
+
+# Frames averaged for the overlay's per-stage numbers
+PROFILER_AVERAGE_FRAMES = 30
+
+# Width (one pixel per frame) and height of the overlay's frame-time graph
+PROFILER_GRAPH_FRAMES = 240
+PROFILER_GRAPH_HEIGHT = 80
+
+
+# ============================================================================
+# CAPTURE SETTINGS
+# ============================================================================
+
+# Frame buffers the game copies presented frames into for the writer thread
+# (each holds one full frame); frames are dropped when all are waiting
+CAPTURE_RING_FRAMES = 16
+
+# zlib level the writer compresses frames with (1 fastest, 9 smallest);
+# 0 writes raw pixels
+CAPTURE_COMPRESSION = 1
+
+
+# ============================================================================
+# ENTITY POOL SETTINGS
+# ============================================================================
+
+# Most finished lasers, explosions and rocks kept around for reuse
+LASER_POOL_SIZE = 64
+BOOM_POOL_SIZE = 256
+ROCK_POOL_SIZE = 1024
+
+
+# ============================================================================
+# ASSET CACHE SETTINGS
+# ============================================================================
+
+# Keep converted images and decoded sounds on disk for faster startup
+USE_ASSET_CACHE = True
+
+# Cache folder, relative to the game folder
+ASSET_CACHE_DIR = ".asset_cache"
+
+
 # ============================================================================
 # AUDIO SETTINGS
 # ============================================================================
@@ -141,14 +267,59 @@ SOUND_COLLECT_CRATE_VOLUME = 1.0
 SOUND_FORCE_FIELD_VOLUME = 0.3
 SOUND_LEVEL_START_VOLUME = 1.0
 
+# Mixer channels reserved per sound category, and each category's priority
+# When a category runs out of channels it takes one from a lower priority
+# category, or the sound is dropped
+SOUND_CHANNELS = {
+    "level": (1, 3),
+    "crate": (2, 3),
+    "shield": (2, 2),
+    "laser": (4, 1),
+    "boom": (6, 1),
+    "force_field": (1, 0),
+}
+
+# Repeats of the same sound within this many milliseconds are not started
+# again; the voice already playing is made louder instead
+SOUND_REPEAT_WINDOW = 40
+
+# Volume added per extra trigger merged into one voice (fraction of its volume)
+SOUND_MERGE_GAIN = 0.25
+
 
 # ============================================================================
 # GAME TIMING SETTINGS
 # ============================================================================
 
-# Target FPS
+# Target FPS (render rate cap)
 TARGET_FPS = 60
 
+# Simulation steps per second, independent of the render rate
+# Entities always move at the speed they would at this many updates per second
+SIM_TICK_RATE = 60
+
+# Longest stretch of real time (milliseconds) simulated in one rendered frame
+# Stops a long stall from queueing up a burst of catch-up steps
+MAX_FRAME_TIME = 250
+
+# How the rest of each frame is waited out: "sleep" (Clock.tick, about 1 ms
+# granularity), "precise" (sleep most of the frame, then spin) or "busy" (spin)
+FRAME_PACING = "sleep"
+
+# Time before the frame deadline at which "precise" pacing stops sleeping (milliseconds)
+PRECISE_PACING_SPIN_MS = 2.0
+
+# Pump events before reading key state, sample input just before the
+# simulation step and drop events the game ignores (mouse motion floods)
+LOW_LATENCY_INPUT = False
+
+# Frames of input-to-present latency kept for the report
+LATENCY_HISTORY = 600
+
+# Simulate the next frame on a worker thread while the last one is drawn and
+# presented (True); frames reach the screen one frame later
+PIPELINED_RENDER = False
+
 # Rock spawn offset from top of screen (pixels)
 ROCK_SPAWN_OFFSET_Y = -40
 
@@ -11,6 +11,8 @@ class Crate(SubSprite):
     Collectible crate that spawns randomly in the upper third of the screen.
     """
     
+    __slots__ = ()
+    
     def __init__(self, game):
         super().__init__()
         self.set_game(game)
@@ -23,8 +25,8 @@ class Crate(SubSprite):
         window_width = game.window.get_width()
         window_height = game.window.get_height()
         self.set_position(
-            rand_int(0, window_width - self.rect.width),
-            rand_int(0, window_height // 3 - self.rect.height)
+            rand_int(0, window_width - self.rect.width, game.rng),
+            rand_int(0, window_height // 3 - self.rect.height, game.rng)
         )
         
         self.set_rect()
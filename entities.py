@@ -0,0 +1,124 @@
+"""
+Container for the game's entity lists with O(1) removal and handles that
+can tell when the entity they pointed at has gone.
+"""
+
+
+class EntityStore:
+    """
+    Dense list of entities in the order they were added.
+
+    Removing an entity leaves a hole that the next compaction closes, so
+    order is kept and each removal is O(1); compaction is one pass over the
+    list, run once an iteration finishes or when the store is next indexed.
+    Iterating visits the entities present when the loop started, so entities
+    may be added or removed from inside the loop. Entities added during a
+    loop are visited by the next one.
+
+    add returns a (slot, generation) handle. Slots are reused, but a slot's
+    generation changes each time its entity is removed, so get on a stale
+    handle returns None rather than whatever took the slot over.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.position = {}
+        self.holes = 0
+        self.iterating = 0
+
+        # Handle slots
+        self.slot_of = {}
+        self.slot_items = []
+        self.generations = []
+        self.free_slots = []
+
+    def __len__(self):
+        return len(self.items) - self.holes
+
+    def __bool__(self):
+        return len(self.items) > self.holes
+
+    def __contains__(self, entity):
+        return entity in self.position
+
+    def __iter__(self):
+        self.iterating += 1
+        try:
+            items = self.items
+            for i in range(len(items)):
+                entity = items[i]
+                if entity is not None:
+                    yield entity
+        finally:
+            self.iterating -= 1
+            if not self.iterating and self.holes:
+                self.compact()
+
+    def __getitem__(self, index):
+        if self.holes and not self.iterating:
+            self.compact()
+        if self.holes:
+            return [entity for entity in self.items if entity is not None][index]
+        return self.items[index]
+
+    def add(self, entity):
+        """Appends an entity and returns its handle."""
+        self.position[entity] = len(self.items)
+        self.items.append(entity)
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slot_items[slot] = entity
+        else:
+            slot = len(self.slot_items)
+            self.slot_items.append(entity)
+            self.generations.append(0)
+        self.slot_of[entity] = slot
+        return (slot, self.generations[slot])
+
+    def remove(self, entity):
+        """Removes an entity, invalidating its handle."""
+        self.items[self.position.pop(entity)] = None
+        self.holes += 1
+        slot = self.slot_of.pop(entity)
+        self.slot_items[slot] = None
+        self.generations[slot] += 1
+        self.free_slots.append(slot)
+
+    def get(self, handle):
+        """Returns the entity a handle refers to, or None if it was removed."""
+        slot, generation = handle
+        if self.generations[slot] != generation:
+            return None
+        return self.slot_items[slot]
+
+    def handle(self, entity):
+        """Returns the current handle of an entity in the store."""
+        slot = self.slot_of[entity]
+        return (slot, self.generations[slot])
+
+    def compact(self):
+        """Closes the holes left by removals, keeping order."""
+        items = self.items
+        position = self.position
+        write = items.index(None)
+        for read in range(write + 1, len(items)):
+            entity = items[read]
+            if entity is not None:
+                items[write] = entity
+                position[entity] = write
+                write += 1
+        del items[write:]
+        self.holes = 0
+
+    def clear(self):
+        """Removes every entity."""
+        for entity in self.items:
+            if entity is not None:
+                slot = self.slot_of[entity]
+                self.slot_items[slot] = None
+                self.generations[slot] += 1
+                self.free_slots.append(slot)
+        self.items = []
+        self.position.clear()
+        self.slot_of.clear()
+        self.holes = 0
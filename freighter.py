@@ -5,7 +5,6 @@ Freighter player ship class.
 import config
 from subsprite import SubSprite
 from funcs import LARGE
-from boom import Boom
 
 
 class Freighter(SubSprite):
@@ -13,6 +12,8 @@ class Freighter(SubSprite):
     Player-controlled freighter ship.
     """
     
+    __slots__ = ("move_delay", "blink_count", "blink_time", "shield_blink_on")
+    
     def __init__(self, game):
         super().__init__()
         self.set_game(game)
@@ -45,7 +46,7 @@ class Freighter(SubSprite):
             if self.hp <= 0:
                 if self.alive:
                     # Create explosion
-                    self.game.boombox.append(Boom(self.game, self.size, self.rect))
+                    self.game.boombox.add(self.game.new_boom(self.size, self.rect))
                     self.game.you_lose = True
                     self.game.all_rock_blast_time = self.game.get_time()
                 self.alive = False
@@ -95,6 +96,7 @@ class Freighter(SubSprite):
     
     def update(self):
         """Update freighter state and position."""
+        self.begin_step()
         self.check_struck()
         if self.alive:
             self.move_me()
@@ -21,9 +21,12 @@ MEDIUM = 10
 LARGE = 11
 
 
-def rand_int(a, b):
-    """Generates a random integer between a and b (inclusive)."""
-    return random.randint(a, b)
+def rand_int(a, b, rng=random):
+    """
+    Generates a random integer between a and b (inclusive), from rng if
+    given (the game's own generator) or the random module otherwise.
+    """
+    return rng.randint(a, b)
 
 
 def round_num(n):
@@ -31,6 +34,21 @@ def round_num(n):
     return round(n)
 
 
+def sprites_collide(sprite1, sprite2, masks=None):
+    """
+    Checks if two sprites touch: their rects overlap and, when masks (tex_*
+    surface -> pygame.Mask) is given, so do their opaque pixels.
+    """
+    rect1 = sprite1.rect
+    rect2 = sprite2.rect
+    if not rect1.colliderect(rect2):
+        return False
+    if masks is None:
+        return True
+    offset = (rect2.x - rect1.x, rect2.y - rect1.y)
+    return masks[sprite1.image].overlap(masks[sprite2.image], offset) is not None
+
+
 def bounce_rocks(rock1, rock2):
     """
     Checks if two rocks collide and bounces the smaller one accordingly.
@@ -80,6 +98,11 @@ def laser_collide(laser, rock):
     If so, damages the rock and destroys the laser.
     """
     if laser.rect.colliderect(rock.rect):
-        rock.hp -= laser.atk
-        laser.alive = False
+        laser_hit(laser, rock)
+
+
+def laser_hit(laser, rock):
+    """Damages a rock struck by a laser and destroys the laser."""
+    rock.hp -= laser.atk
+    laser.alive = False
 
@@ -2,6 +2,9 @@
 Main Game class - handles game loop, events, and entity management.
 """
 
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 import pygame
 import random
 import config
@@ -11,7 +14,33 @@ from crate import Crate
 from rock import Rock
 from laser import Laser
 from boom import Boom
-from funcs import rand_int, round_num, bounce_rocks, laser_collide
+from spatial import SpatialHash, RockSweep
+from render import DirtyRects, FrameSnapshot, RenderQueue, ScaledPresenter
+from startup import StartupTimer
+from voices import VoiceManager
+from pool import EntityPool
+from entities import EntityStore
+from profiler import FrameProfiler
+from hud import HudCompositor
+from pacing import FramePacer, LatencyStats
+from capture import FrameCapture
+import replay
+import rock_engine
+import particles
+from funcs import rand_int, round_num, laser_hit, sprites_collide, LARGE
+
+
+# Render queue layers, drawn in this order
+LAYER_LASERS = 0
+LAYER_FREIGHTER = 1
+LAYER_HEALTH_BAR = 2
+LAYER_ROCKS = 3
+LAYER_CRATES = 4
+LAYER_EXPLOSIONS = 5
+LAYER_COUNT = 6
+
+# Event types let through in low-latency input mode
+INPUT_EVENTS = [pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN]
 
 
 class Game:
@@ -19,33 +48,127 @@ class Game:
     Main game class that manages the game loop, entities, and game state.
     """
     
-    def __init__(self):
+    def __init__(self, headless=False, startup=None, seed=None, surface=None):
+        # Time each startup phase up to the first frame
+        self.startup = startup if startup is not None else StartupTimer()
+        
+        # Headless mode simulates without a display, sound or frame cap;
+        # a headless game given a surface draws its frames onto that instead
+        self.headless = headless
+        self.frame_count = 0
+        
+        # Fixed-timestep simulation clock
+        self.tick_count = 0
+        self.tick_ms = 1000.0 / config.SIM_TICK_RATE
+        self.accumulator = 0.0
+        self.alpha = 1.0
+        self.last_frame_ticks = 0
+        
+        # Game time per unit of real time (replays can run faster)
+        self.time_scale = 1.0
+        
+        # Every random choice in play comes from this, so a seed and the
+        # recorded inputs reproduce a run exactly
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.recorder = None
+        self.replay = None
+        
         # Window dimensions
         self.sw = config.WINDOW_WIDTH
         self.sh = config.WINDOW_HEIGHT
         self.bits_per_pixel = config.WINDOW_BITS_PER_PIXEL
         
-        # Initialize pygame
-        pygame.init()
+        # Initialize only the pygame modules needed for the first frame;
+        # the mixer starts in the background with the sounds
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark("pygame init")
         
         # Try fullscreen, fallback to windowed
-        if config.USE_FULLSCREEN:
+        logical = config.LOGICAL_RESOLUTION
+        if surface is not None:
+            # Drawing goes to the caller's surface; the display only sets the pixel format
+            self.display = pygame.display.get_surface() or pygame.display.set_mode((1, 1))
+        elif headless:
+            self.display = pygame.display.set_mode(logical or (self.sw, self.sh))
+        elif logical is not None and config.SCALE_MODE == "scaled":
+            # SDL scales the playfield to the window when presenting
+            flags = pygame.SCALED | (pygame.FULLSCREEN if config.USE_FULLSCREEN else 0)
+            self.display = pygame.display.set_mode(logical, flags)
+        elif config.USE_FULLSCREEN:
             try:
-                self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+                self.display = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
             except:
-                self.window = pygame.display.set_mode((self.sw, self.sh))
+                self.display = pygame.display.set_mode((self.sw, self.sh))
         else:
-            self.window = pygame.display.set_mode((self.sw, self.sh))
+            self.display = pygame.display.set_mode((self.sw, self.sh))
+        
+        # Everything is simulated and drawn on window, the playfield; when it
+        # differs in size from the display it is offscreen and scaled up
+        self.window = self.display
+        self.presenter = None
+        if surface is not None:
+            self.window = surface
+        elif logical is not None and self.display.get_size() != tuple(logical):
+            self.window = pygame.Surface(logical).convert()
+            self.presenter = ScaledPresenter(self.window, self.display)
         
         pygame.display.set_caption("Freighter")
-        self.clock = pygame.time.Clock()
+        self.startup.mark("display")
         
-        # Calculate area modifier
-        self.area_mod = round_num((self.window.get_width() + self.window.get_height()) / config.AREA_MODIFIER_DIVISOR)
+        # Partial display updates instead of a full clear and flip each frame
+        self.dirty_rects = None
+        if config.USE_DIRTY_RECTS and not headless:
+            self.dirty_rects = DirtyRects(self.window, config.DIRTY_RECT_MAX_FRACTION)
+        
+        # Sprites are queued while drawing and blitted in one call per layer
+        self.render_queue = RenderQueue(self.window, LAYER_COUNT)
+        
+        # Pipelined mode simulates the next frame on a worker thread while
+        # the main thread draws and presents the snapshot of the last one
+        self.pipeline = None
+        self.pending_frame = None
+        if config.PIPELINED_RENDER and not headless:
+            self.pipeline = ThreadPoolExecutor(max_workers=1, thread_name_prefix="simulation")
+        
+        # Frame pacing, and input-to-present latency of each presented frame
+        self.pacer = FramePacer(config.FRAME_PACING, config.TARGET_FPS, config.PRECISE_PACING_SPIN_MS)
+        self.latency = LatencyStats(config.LATENCY_HISTORY)
+        self.input_time = 0.0
+        
+        # Copies each presented frame out to disk when capturing
+        self.frame_capture = None
+        
+        # Low-latency input reads key state after the event queue is pumped
+        # and keeps events the game ignores, like mouse motion, out of it
+        self.low_latency_input = config.LOW_LATENCY_INPUT
+        if self.low_latency_input:
+            pygame.event.set_blocked(None)
+            pygame.event.set_allowed(INPUT_EVENTS)
+        
+        # Per-stage frame timings, shown with F3
+        self.profiler = FrameProfiler(self)
+        
+        # Calculate area modifier from the playfield, or the physical display if configured
+        if config.ROCKS_FROM_DISPLAY_SIZE and surface is None:
+            area_width, area_height = pygame.display.get_window_size()
+        else:
+            area_width, area_height = self.window.get_size()
+        self.area_mod = round_num((area_width + area_height) / config.AREA_MODIFIER_DIVISOR)
         
         # Load resources
-        self.loads = Loads()
+        self.loads = Loads(self.startup)
         self.loads.game_text_config(self)
+        self.startup.mark("hud text")
+        
+        # Sprite masks for pixel-accurate collision, or None to collide by rect
+        self.collision_masks = self.loads.masks if config.PIXEL_COLLISION else None
         
         # Create freighter
         self.freighter = Freighter(self)
@@ -59,6 +182,10 @@ class Game:
         self.level = 1
         self.max_level = config.MAX_LEVEL
         
+        # Running totals for the whole game
+        self.crates_collected = 0
+        self.rocks_destroyed = 0
+        
         # Game state flags
         self.engageable = True
         self.you_lose = False
@@ -67,12 +194,44 @@ class Game:
         self.ff_blink_on = False
         
         # Entity containers
-        self.cratebox = []
-        self.rockbox = []
-        self.laserbox = []
-        self.boombox = []
+        self.cratebox = EntityStore()
+        self.rockbox = EntityStore()
+        self.laserbox = EntityStore()
+        self.boombox = EntityStore()
         self.soundbox = []  # For managing sound instances
         
+        # Finished lasers, explosions and rocks are reused
+        self.laser_pool = EntityPool(Laser, config.LASER_POOL_SIZE)
+        self.boom_pool = EntityPool(Boom, config.BOOM_POOL_SIZE)
+        self.rock_pool = EntityPool(Rock, config.ROCK_POOL_SIZE)
+        
+        # Sound effects go through channel groups per category
+        self.voices = VoiceManager(self)
+        
+        # Broad phase for rock-to-rock bouncing (cells fit the largest rock)
+        rock_textures = (self.loads.tex_sm_rock, self.loads.tex_md_rock,
+                         self.loads.tex_lg_rock, self.loads.tex_lg_rock2)
+        self.rock_grid = SpatialHash(max(max(tex.get_size()) for tex in rock_textures))
+        self.rock_pair_tests = 0
+        
+        # Broad phase for swept laser-to-rock hits
+        self.rock_sweep = RockSweep()
+        self.laser_pair_tests = 0
+        
+        # Optional NumPy rock engine (falls back to per-rock updates without NumPy)
+        self.rock_engine = None
+        if config.USE_ROCK_ENGINE and rock_engine.available():
+            self.rock_engine = rock_engine.RockEngine(self)
+        
+        # Optional NumPy sparks and debris thrown out by explosions
+        self.particles = None
+        if config.USE_PARTICLES and particles.available():
+            self.particles = particles.ParticleSystem(
+                config.PARTICLE_CAPACITY, config.PARTICLE_SIZE,
+                config.PARTICLE_GRAVITY, config.PARTICLE_DRAG, seed)
+            self.spark_emitter = particles.Emitter(config.SPARK_SPEED, config.SPARK_LIFE, config.SPARK_COLORS)
+            self.debris_emitter = particles.Emitter(config.DEBRIS_SPEED, config.DEBRIS_LIFE, config.DEBRIS_COLORS)
+        
         # World shapes (force field, health bars, bases)
         self.force_rect = None
         self.g_hp_bar = None
@@ -80,11 +239,16 @@ class Game:
         self.lbase_rect = None
         self.rbase_rect = None
         
-        # Setup initial level
-        self.level_setup()
+        # Cached layer for the HUD along the bottom of the window
+        self.hud = HudCompositor(self)
         
         # Music state
         self.music_playing = False
+        self.music_started = False
+        
+        # Setup initial level
+        self.level_setup()
+        self.startup.mark("level setup")
     
     def get_time(self):
         """Returns the current game time in milliseconds."""
@@ -103,29 +267,62 @@ class Game:
         self.ff_blink_on = True
         self.ff_blink_time = self.time
     
-    def play_sound(self, sound_buffer, volume=1.0):
-        """Plays a sound effect."""
-        sound_buffer.set_volume(volume)
-        sound_buffer.play()
+    def play_sound(self, sound_buffer, category, volume=1.0):
+        """Queues a sound effect in its category, if it has finished loading."""
+        self.voices.play(sound_buffer, category, volume)
+    
+    def new_laser(self):
+        """Returns a laser from the pool, fired from the freighter."""
+        return self.laser_pool.acquire(self)
+    
+    def new_boom(self, size, sprite_rect):
+        """Returns an explosion from the pool, centred on sprite_rect, and throws out its particles."""
+        if self.particles is not None:
+            self.emit_particles(size, sprite_rect.centerx, sprite_rect.centery)
+        return self.boom_pool.acquire(self, size, sprite_rect)
+    
+    def emit_particles(self, size, x, y):
+        """Throws out an explosion's sparks and debris from (x, y)."""
+        index = 0 if size == LARGE else 1
+        self.particles.burst(x, y, ((self.spark_emitter, config.BOOM_SPARKS[index]),
+                                    (self.debris_emitter, config.BOOM_DEBRIS[index])))
+    
+    def new_rock(self, size):
+        """Returns a rock of the given size from the pool."""
+        return self.rock_pool.acquire(self, size)
+    
+    def format_pool_report(self):
+        """Returns the entity pool statistics as printable text."""
+        pools = (self.laser_pool, self.boom_pool, self.rock_pool)
+        return "\n".join(pool.format() for pool in pools)
     
     def create_crates(self):
         """Creates the required number of crates for the current level."""
         for _ in range(self.total_crates):
-            self.cratebox.append(Crate(self))
+            self.cratebox.add(Crate(self))
     
     def create_rocks(self):
         """Creates the required number of rocks for the current level."""
         from funcs import SMALL, LARGE
         for _ in range(self.total_rocks):
-            rock = Rock(self, rand_int(SMALL, LARGE))
+            rock = self.new_rock(rand_int(SMALL, LARGE, self.rng))
             # Rocks created at level start are positioned randomly on screen
             window_width = self.window.get_width()
             window_height = self.window.get_height()
             rock.set_position(
-                rand_int(0, window_width - rock.rect.width),
-                rand_int(0, window_height - (rock.rect.height + self.freighter.rect.height + 10))
+                rand_int(0, window_width - rock.rect.width, self.rng),
+                rand_int(0, window_height - (rock.rect.height + self.freighter.rect.height + 10), self.rng)
             )
-            self.rockbox.append(rock)
+            self.add_rock(rock)
+    
+    def add_rock(self, rock):
+        """Adds a rock to play, handing it to the rock engine if one is running."""
+        if self.rock_engine is not None:
+            view = self.rock_engine.adopt(rock)
+            # The engine keeps its own copy, so the object can go straight back
+            self.rock_pool.release(rock)
+            rock = view
+        self.rockbox.add(rock)
     
     def create_world_shapes(self):
         """Creates the force field, health bars, and base images."""
@@ -150,6 +347,7 @@ class Game:
         self.rbase_rect = self.rbase_image.get_rect()
         self.lbase_rect.bottomleft = (0, window_height)
         self.rbase_rect.bottomright = (window_width, window_height)
+        self.hud.invalidate()
     
     def destroy_sounds(self):
         """Removes finished sounds from the sound list."""
@@ -161,21 +359,88 @@ class Game:
         """Handles freighter movement based on keyboard input."""
         keys = pygame.key.get_pressed()
         
+        held = 0
         if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.freighter.x_velocity = -self.freighter.x_speed
+            held |= replay.HOLD_LEFT
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.freighter.x_velocity = self.freighter.x_speed
+            held |= replay.HOLD_RIGHT
         if keys[pygame.K_UP] or keys[pygame.K_w]:
-            self.freighter.y_velocity = -self.freighter.y_speed
+            held |= replay.HOLD_UP
         if keys[pygame.K_DOWN] or keys[pygame.K_s]:
-            self.freighter.y_velocity = self.freighter.y_speed
+            held |= replay.HOLD_DOWN
+        if held:
+            self.input(replay.INPUT_HOLD | held)
+    
+    def input(self, code):
+        """
+        Applies one gameplay input from the player, recording it if a
+        recording is running. Player input is ignored during a replay.
+        """
+        if self.replay is not None:
+            return
+        if self.recorder is not None:
+            self.recorder.record(self.tick_count, code)
+        self.apply_input(code)
+    
+    def apply_input(self, code):
+        """Carries out one gameplay input code (see replay.py)."""
+        if code < replay.INPUT_SHOOT:
+            if code & replay.HOLD_LEFT:
+                self.freighter.x_velocity = -self.freighter.x_speed
+            if code & replay.HOLD_RIGHT:
+                self.freighter.x_velocity = self.freighter.x_speed
+            if code & replay.HOLD_UP:
+                self.freighter.y_velocity = -self.freighter.y_speed
+            if code & replay.HOLD_DOWN:
+                self.freighter.y_velocity = self.freighter.y_speed
+        elif code == replay.INPUT_SHOOT:
+            self.shoot_laser()
+        elif code == replay.INPUT_STOP_X:
+            self.freighter.x_velocity = 0
+        elif code == replay.INPUT_STOP_Y:
+            self.freighter.y_velocity = 0
+        elif code == replay.INPUT_CONTINUE:
+            if self.you_win_game or self.you_lose:
+                self.level = 1
+                self.level_setup()
+            elif self.you_win:
+                self.level_setup()
+    
+    def start_recording(self, path):
+        """Starts writing every gameplay input to a recording file."""
+        header = replay.RecordingHeader(self.seed, config.SIM_TICK_RATE,
+                                        self.window.get_width(), self.window.get_height())
+        self.recorder = replay.InputRecorder(path, header)
+    
+    def start_capture(self, path):
+        """Starts writing every presented frame to a capture file."""
+        self.frame_capture = FrameCapture(path, self.display, config.CAPTURE_RING_FRAMES,
+                                          config.CAPTURE_COMPRESSION, config.SIM_TICK_RATE)
+    
+    def start_replay(self, path, speed=1.0):
+        """
+        Plays a recording back in place of player input. The game must have
+        been built with the recording's seed and window size and not yet
+        run. speed scales game time against real time when not headless.
+        """
+        self.replay = replay.InputReplay(path)
+        header = self.replay.header
+        if header.seed != self.seed:
+            raise ValueError(f"recording was made with seed {header.seed}, game has {self.seed}")
+        if header.tick_rate != config.SIM_TICK_RATE:
+            raise ValueError(f"recording was made at {header.tick_rate} ticks per second, "
+                             f"SIM_TICK_RATE is {config.SIM_TICK_RATE}")
+        if (header.width, header.height) != self.window.get_size():
+            raise ValueError(f"recording was made in a {header.width}x{header.height} window, "
+                             f"game window is {self.window.get_width()}x{self.window.get_height()}")
+        self.time_scale = speed
     
     def ff_blink(self):
         """Handles force field blink animation when hit."""
         if self.ff_blink_on:
             self.force_color = (0, 127, 200)
             if self.time - self.ff_blink_time >= config.FORCE_FIELD_BLINK_DURATION:
-                self.play_sound(self.loads.force_field_buffer, config.SOUND_FORCE_FIELD_VOLUME)
+                self.play_sound(self.loads.force_field_buffer, "force_field", config.SOUND_FORCE_FIELD_VOLUME)
                 self.force_color = (0, 0, 0)
                 self.ff_blink_on = False
     
@@ -192,6 +457,11 @@ class Game:
         self.total_rocks = self.level * self.area_mod
         
         self.cratebox.clear()
+        if self.rock_engine is not None:
+            self.rock_engine.clear()
+        else:
+            for rock in self.rockbox:
+                self.rock_pool.release(rock)
         self.rockbox.clear()
         
         self.freighter.alive = True
@@ -209,7 +479,23 @@ class Game:
         
         self.loads.update_level_text(self.level)
         
-        self.play_sound(self.loads.level_start, config.SOUND_LEVEL_START_VOLUME)
+        # Played by update_audio once the sound has loaded
+        self.level_start_pending = True
+    
+    def restart(self, level=1):
+        """Starts over at level, with no lasers, explosions or particles left in play."""
+        for laser in self.laserbox:
+            self.laser_pool.release(laser)
+        self.laserbox.clear()
+        for boom in self.boombox:
+            self.boom_pool.release(boom)
+        self.boombox.clear()
+        if self.particles is not None:
+            self.particles.clear()
+        self.freighter.x_velocity = 0
+        self.freighter.y_velocity = 0
+        self.level = level
+        self.level_setup()
     
     def level_up(self):
         """Advances to the next level."""
@@ -218,39 +504,35 @@ class Game:
         else:
             self.level += 1
     
-    def print_bottom_text(self):
-        """Draws bottom text (level and music status)."""
-        self.window.blit(self.loads.level_text, self.loads.level_text_pos)
-        self.window.blit(self.loads.music_text, self.loads.music_text_pos)
-    
-    def print_top_text(self):
-        """Draws top text (win/lose messages)."""
+    def top_text(self):
+        """Returns the top text (win/lose messages) to draw, as (surface, position) pairs."""
+        loads = self.loads
         if self.you_win_game:
-            self.window.blit(self.loads.congrats_text, self.loads.congrats_text_pos)
-            self.window.blit(self.loads.win_game_text, self.loads.win_game_text_pos)
-            self.window.blit(self.loads.play_again_text, self.loads.play_again_text_pos)
-        elif self.you_win:
-            self.window.blit(self.loads.win_text, self.loads.win_text_pos)
-            self.window.blit(self.loads.advance_text, self.loads.advance_text_pos)
-        elif self.you_lose:
-            self.window.blit(self.loads.lose_text, self.loads.lose_text_pos)
-            self.window.blit(self.loads.restart_text, self.loads.restart_text_pos)
+            return [(loads.congrats_text, loads.congrats_text_pos),
+                    (loads.win_game_text, loads.win_game_text_pos),
+                    (loads.play_again_text, loads.play_again_text_pos)]
+        if self.you_win:
+            return [(loads.win_text, loads.win_text_pos),
+                    (loads.advance_text, loads.advance_text_pos)]
+        if self.you_lose:
+            return [(loads.lose_text, loads.lose_text_pos),
+                    (loads.restart_text, loads.restart_text_pos)]
+        return []
     
     def refill_rocks(self):
         """Creates new rocks when they are destroyed."""
         from funcs import SMALL, LARGE
         if not self.you_win and len(self.rockbox) < self.total_rocks:
-            self.rockbox.append(Rock(self, rand_int(SMALL, LARGE)))
+            self.add_rock(self.new_rock(rand_int(SMALL, LARGE, self.rng)))
     
     def run_crates(self):
-        """Updates and draws crates, handles collection."""
-        for crate in self.cratebox[:]:
-            self.window.blit(crate.image, crate.rect)
-            
+        """Updates crates, handles collection."""
+        for crate in self.cratebox:
             # Check if freighter collects the crate
-            if self.freighter.alive and crate.rect.colliderect(self.freighter.rect):
+            if self.freighter.alive and sprites_collide(crate, self.freighter, self.collision_masks):
                 if crate.alive:
-                    self.play_sound(self.loads.collect_crate_buffer, config.SOUND_COLLECT_CRATE_VOLUME)
+                    self.play_sound(self.loads.collect_crate_buffer, "crate", config.SOUND_COLLECT_CRATE_VOLUME)
+                    self.crates_collected += 1
                 crate.alive = False
             
             if not crate.alive:
@@ -263,71 +545,115 @@ class Game:
                     self.level_up()
     
     def run_explosions(self):
-        """Updates and draws explosions."""
-        for boom in self.boombox[:]:
+        """Updates explosions."""
+        for boom in self.boombox:
             boom.update()
-            self.window.blit(boom.image, boom.rect)
-            
             if not boom.alive:
                 self.boombox.remove(boom)
+                self.boom_pool.release(boom)
+    
+    def run_particles(self):
+        """Moves and ages explosion particles."""
+        if self.particles is not None:
+            self.particles.step(1 / config.SIM_TICK_RATE)
     
     def run_freighter(self):
-        """Updates and draws the freighter."""
+        """Updates the freighter."""
         self.freighter.update()
-        if self.freighter.alive:
-            self.window.blit(self.freighter.image, self.freighter.rect)
     
     def run_force_field(self):
-        """Updates and draws the force field and bases."""
+        """Updates the force field."""
         self.ff_blink()
-        pygame.draw.rect(self.window, self.force_color, self.force_rect)
-        self.window.blit(self.lbase_image, self.lbase_rect)
-        self.window.blit(self.rbase_image, self.rbase_rect)
     
     def run_lasers(self):
-        """Updates and draws lasers, handles collisions."""
-        for laser in self.laserbox[:]:
+        """Updates lasers, handles collisions."""
+        if self.laserbox:
+            self.rock_sweep.rebuild(self.rockbox)
+        for laser in self.laserbox:
             laser.update()
-            self.window.blit(laser.image, laser.rect)
             
-            # Check collisions with rocks
-            for rock in self.rockbox:
-                laser_collide(laser, rock)
+            # Check the path covered this step against rocks, first hit only
+            if laser.alive:
+                swept = laser.swept_rect()
+                if self.collision_masks is None:
+                    rock = self.rock_sweep.first_hit(swept)
+                else:
+                    rock = self.rock_sweep.first_hit(swept, laser.swept_mask(), self.collision_masks)
+                if rock is not None:
+                    laser_hit(laser, rock)
             
             if not laser.alive:
                 self.laserbox.remove(laser)
+                self.laser_pool.release(laser)
+        self.laser_pair_tests = self.rock_sweep.pair_tests
     
     def run_rocks(self):
-        """Updates and draws rocks, handles collisions."""
-        for rock1 in self.rockbox[:]:
+        """Updates rocks, handles collisions."""
+        if self.rock_engine is not None:
+            self.run_rock_engine()
+        else:
+            self.run_rock_objects()
+        
+        # Destroy all rocks if level won
+        if self.you_win and len(self.rockbox) > 0 and self.time - self.all_rock_blast_time >= config.LEVEL_WIN_ROCK_DESTROY_DELAY:
+            if self.rockbox:
+                self.rockbox[0].alive = False
+            self.all_rock_blast_time = self.time
+    
+    def run_rock_engine(self):
+        """Updates and collides every rock in bulk through the rock engine."""
+        engine = self.rock_engine
+        engine.step(self.time)
+        self.rock_pair_tests = engine.bounce()
+        
+        # Check collision with freighter
+        if self.engageable and self.freighter.alive:
+            for rock in engine.overlapping(self.freighter.rect):
+                if not sprites_collide(rock, self.freighter, self.collision_masks):
+                    continue
+                if rock.alive:
+                    self.play_sound(self.loads.shield_hit_buffer, "shield", config.SOUND_SHIELD_HIT_VOLUME)
+                rock.alive = False
+                self.freighter.hp -= rock.atk
+                self.freighter.struck = True
+        
+        for rock in engine.dead():
+            if rock.hp <= 0:
+                self.rocks_destroyed += 1
+            self.boombox.add(self.new_boom(rock.size, rock.rect))
+            self.rockbox.remove(rock)
+            engine.release(rock)
+    
+    def run_rock_objects(self):
+        """Updates rocks one object at a time."""
+        self.rock_grid.rebuild(self.rockbox)
+        for rock1 in self.rockbox:
             rock1.update()
-            self.window.blit(rock1.image, rock1.rect)
             
-            # Check collisions with other rocks
-            for rock2 in self.rockbox:
-                if rock1 != rock2:
-                    bounce_rocks(rock1, rock2)
+            # Check collisions with nearby rocks
+            self.rock_grid.move(rock1)
+            self.rock_grid.bounce(rock1)
             
             # Check collision with freighter
-            if self.engageable and self.freighter.alive and rock1.rect.colliderect(self.freighter.rect):
+            if (self.engageable and self.freighter.alive and
+                    sprites_collide(rock1, self.freighter, self.collision_masks)):
                 if rock1.alive:
-                    self.play_sound(self.loads.shield_hit_buffer, config.SOUND_SHIELD_HIT_VOLUME)
+                    self.play_sound(self.loads.shield_hit_buffer, "shield", config.SOUND_SHIELD_HIT_VOLUME)
                 rock1.alive = False
                 self.freighter.hp -= rock1.atk
                 self.freighter.struck = True
             
             if not rock1.alive:
-                self.boombox.append(Boom(self, rock1.size, rock1.rect))
+                if rock1.hp <= 0:
+                    self.rocks_destroyed += 1
+                self.boombox.add(self.new_boom(rock1.size, rock1.rect))
                 self.rockbox.remove(rock1)
-        
-        # Destroy all rocks if level won
-        if self.you_win and len(self.rockbox) > 0 and self.time - self.all_rock_blast_time >= config.LEVEL_WIN_ROCK_DESTROY_DELAY:
-            if self.rockbox:
-                self.rockbox[0].alive = False
-            self.all_rock_blast_time = self.time
+                self.rock_grid.remove(rock1)
+                self.rock_pool.release(rock1)
+        self.rock_pair_tests = self.rock_grid.pair_tests
     
     def set_health_bar(self):
-        """Updates and draws the health bar."""
+        """Updates the health bar."""
         hp_bar_base_width = self.freighter.rect.width - config.HEALTH_BAR_WIDTH_OFFSET
         self.r_hp_bar.x = self.freighter.rect.x + config.HEALTH_BAR_OFFSET_X
         self.r_hp_bar.y = self.freighter.rect.y + self.freighter.rect.height + config.HEALTH_BAR_OFFSET_Y
@@ -338,102 +664,360 @@ class Game:
         # Scale green bar based on HP percentage
         hp_ratio = self.freighter.hp / self.freighter.max_hp if self.freighter.max_hp > 0 else 0
         self.g_hp_bar.width = int(hp_bar_base_width * hp_ratio)
-        
-        if self.freighter.alive:
-            pygame.draw.rect(self.window, (255, 0, 0), self.r_hp_bar)
-            pygame.draw.rect(self.window, (0, 255, 0), self.g_hp_bar)
     
     def shoot_laser(self):
         """Creates a new laser projectile."""
         # Check cooldown before allowing shot
         if (self.engageable and self.freighter.alive and 
             self.time - self.last_laser_shot_time >= config.LASER_SHOT_COOLDOWN):
-            self.laserbox.append(Laser(self))
+            self.laserbox.add(self.new_laser())
             self.last_laser_shot_time = self.time
     
-    def run(self):
-        """Main game loop."""
-        # Start music
-        pygame.mixer.music.load(self.loads.techno_beat)
-        pygame.mixer.music.set_volume(config.MUSIC_VOLUME)
-        pygame.mixer.music.play(-1)  # Loop forever
-        self.music_playing = True
-        
+    def draw_crates(self):
+        """Queues crates for drawing."""
+        self.render_queue.submit_sprites(LAYER_CRATES, self.cratebox, self.alpha)
+    
+    def draw_explosions(self):
+        """Queues explosions for drawing."""
+        self.render_queue.submit_sprites(LAYER_EXPLOSIONS, self.boombox, self.alpha)
+    
+    def draw_freighter(self):
+        """Queues the freighter for drawing."""
+        if self.freighter.alive:
+            self.render_queue.submit(LAYER_FREIGHTER, self.freighter.image,
+                                     self.freighter.draw_position(self.alpha))
+    
+    def draw_health_bar(self):
+        """Queues the health bar for drawing."""
+        if self.freighter.alive:
+            # Follow the interpolated freighter rather than its simulated rect
+            draw_x, draw_y = self.freighter.draw_position(self.alpha)
+            dx = draw_x - self.freighter.rect.x
+            dy = draw_y - self.freighter.rect.y
+            bar = self.hud.health_bar(self.r_hp_bar.size, self.g_hp_bar.width)
+            self.render_queue.submit(LAYER_HEALTH_BAR, bar, (self.r_hp_bar.x + dx, self.r_hp_bar.y + dy))
+    
+    def draw_lasers(self):
+        """Queues lasers for drawing."""
+        self.render_queue.submit_sprites(LAYER_LASERS, self.laserbox, self.alpha)
+    
+    def draw_rocks(self):
+        """Queues rocks for drawing."""
+        if self.rock_engine is not None:
+            width, height = self.window.get_size()
+            pairs, culled = self.rock_engine.sprites(self.alpha, width, height)
+            self.render_queue.extend(LAYER_ROCKS, pairs, culled)
+        else:
+            self.render_queue.submit_sprites(LAYER_ROCKS, self.rockbox, self.alpha)
+    
+    def mark(self, rect):
+        """Records a drawn rect when the dirty-rectangle renderer is on."""
+        if self.dirty_rects is not None:
+            self.dirty_rects.add(rect)
+    
+    def update_time(self):
+        """Sets the game clock from the number of simulation ticks run."""
+        self.time = self.tick_count * 1000 // config.SIM_TICK_RATE
+    
+    def rewind_clock(self):
+        """
+        Sets the simulation clock, and the timers that run off it, back to
+        where a new game starts them. Movement is paced by the clock, so a
+        reseeded game only plays out the same when rewound as well.
+        """
+        self.tick_count = 0
+        self.accumulator = 0.0
+        self.update_time()
+        self.ff_blink_time = 0
+        self.all_rock_blast_time = 0
+        self.last_laser_shot_time = 0
+        freighter = self.freighter
+        freighter.last_move_time = 0
+        freighter.blink_time = 0
+        freighter.blink_count = 0
+        freighter.shield_blink_on = False
+    
+    def tick(self):
+        """Advances the simulation by one fixed step."""
+        if self.replay is not None:
+            for code in self.replay.due(self.tick_count):
+                self.apply_input(code)
+        self.tick_count += 1
+        self.update_time()
+        self.update()
+    
+    def handle_events(self):
+        """Handles input events. Returns False when the game should quit."""
         running = True
         
-        while running:
-            # Update time
-            self.time = pygame.time.get_ticks()
-            
-            # Handle freighter movement
+        # Handle freighter movement
+        if not self.low_latency_input:
             self.freighter_movement()
+        
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
             
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
                     running = False
-                
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        running = False
-                    elif event.key == pygame.K_SPACE:
-                        self.shoot_laser()
-                    elif event.key == pygame.K_F12:
-                        # Toggle music
-                        if self.music_playing:
+                elif event.key == pygame.K_SPACE:
+                    self.input(replay.INPUT_SHOOT)
+                elif event.key == pygame.K_F12:
+                    # Toggle music
+                    if self.music_playing:
+                        if self.music_started:
                             pygame.mixer.music.stop()
-                            self.music_playing = False
-                        else:
-                            pygame.mixer.music.play(-1)
-                            self.music_playing = True
-                        self.loads.update_music_text(self.music_playing)
-                    elif event.key == pygame.K_F5:
-                        if self.you_win_game or self.you_lose:
-                            self.level = 1
-                            self.level_setup()
-                        elif self.you_win:
-                            self.level_setup()
-                
-                elif event.type == pygame.KEYUP:
-                    # Stop movement when keys released
-                    if event.key in (pygame.K_LEFT, pygame.K_a):
-                        self.freighter.x_velocity = 0
-                    elif event.key in (pygame.K_RIGHT, pygame.K_d):
-                        self.freighter.x_velocity = 0
-                    elif event.key in (pygame.K_UP, pygame.K_w):
-                        self.freighter.y_velocity = 0
-                    elif event.key in (pygame.K_DOWN, pygame.K_s):
-                        self.freighter.y_velocity = 0
-                
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left mouse button
-                        self.shoot_laser()
-            
-            # Clear screen
-            self.window.fill((0, 0, 0))
+                            self.music_started = False
+                        self.music_playing = False
+                    else:
+                        # Started by update_audio once the music has loaded
+                        self.music_playing = True
+                    self.loads.update_music_text(self.music_playing)
+                elif event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                elif event.key == pygame.K_F4:
+                    self.export_profile()
+                elif event.key == pygame.K_F5:
+                    self.input(replay.INPUT_CONTINUE)
             
-            # Draw bottom text
-            self.print_bottom_text()
+            elif event.type == pygame.KEYUP:
+                # Stop movement when keys released
+                if event.key in (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d):
+                    self.input(replay.INPUT_STOP_X)
+                elif event.key in (pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s):
+                    self.input(replay.INPUT_STOP_Y)
             
-            # Update and draw game entities
-            self.destroy_sounds()
-            self.run_force_field()
-            self.run_lasers()
-            self.run_freighter()
-            self.set_health_bar()
-            self.run_rocks()
-            self.run_crates()
-            self.run_explosions()
-            self.refill_rocks()
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left mouse button
+                    self.input(replay.INPUT_SHOOT)
+        
+        # Key state read after the pump matches the events just handled
+        if self.low_latency_input:
+            self.freighter_movement()
+        self.input_time = time.perf_counter()
+        
+        return running
+    
+    def update_audio(self):
+        """Starts sounds that were waiting for the background audio loader."""
+        if self.level_start_pending and self.loads.level_start is not None:
+            self.play_sound(self.loads.level_start, "level", config.SOUND_LEVEL_START_VOLUME)
+            self.level_start_pending = False
+        if self.music_playing and not self.music_started and self.loads.music_loaded:
+            pygame.mixer.music.set_volume(config.MUSIC_VOLUME)
+            pygame.mixer.music.play(-1)  # Loop forever
+            self.music_started = True
+    
+    def update(self):
+        """Updates every game entity by one frame."""
+        if self.profiler.enabled:
+            self.profiler.run_update(self)
+            return
+        self.destroy_sounds()
+        self.run_force_field()
+        self.run_lasers()
+        self.run_freighter()
+        self.set_health_bar()
+        self.run_rocks()
+        self.run_crates()
+        self.run_explosions()
+        self.run_particles()
+        self.refill_rocks()
+    
+    def capture(self):
+        """
+        Collects everything this frame draws into a FrameSnapshot, reading
+        the game's state but drawing nothing to the window.
+        """
+        self.draw_lasers()
+        self.draw_freighter()
+        self.draw_health_bar()
+        self.draw_rocks()
+        self.draw_crates()
+        self.draw_explosions()
+        particle_state = None
+        if self.particles is not None:
+            particle_state = self.particles.snapshot(self.alpha, *self.window.get_size())
+        return FrameSnapshot(self.render_queue.take(), particle_state, self.hud.state(),
+                             self.top_text(), self.input_time, self.tick_count)
+    
+    def render(self, snapshot):
+        """Draws a captured frame to the window, reading nothing but the snapshot."""
+        # Clear screen, or only what changed since last frame
+        if self.dirty_rects is not None:
+            self.dirty_rects.clear()
+        else:
+            self.window.fill((0, 0, 0))
+        
+        # Draw bottom text, force field and bases from the cached HUD layer
+        rect = self.hud.draw(self.window, self.dirty_rects, snapshot.hud)
+        if rect is not None:
+            self.mark(rect)
+        
+        # Draw game entities, then explosion particles in one batch
+        self.render_queue.draw(snapshot.layers, self.dirty_rects)
+        if snapshot.particles is not None:
+            rects = self.particles.draw(self.window, snapshot=snapshot.particles)
+            if self.dirty_rects is not None:
+                self.dirty_rects.extend(rects)
+        
+        # Draw top text
+        for surface, position in snapshot.overlay:
+            self.mark(self.window.blit(surface, position))
+    
+    def draw(self):
+        """Draws the whole frame to the window."""
+        self.render(self.capture())
+    
+    def present(self):
+        """Shows the drawn frame: scaled, as dirty regions or as a full flip."""
+        if self.presenter is not None:
+            if self.dirty_rects is not None:
+                self.dirty_rects.finish()
+            self.presenter.present()
+        elif self.dirty_rects is not None:
+            self.dirty_rects.present()
+        else:
+            pygame.display.flip()
+    
+    def step(self):
+        """
+        Runs one frame: input, then one simulation tick when headless, or as
+        many fixed ticks as real time has covered followed by an interpolated
+        draw and frame pacing. When pipelined, the ticks for this frame run on
+        the worker while the previous frame is drawn. Returns False when the
+        game should quit.
+        """
+        profiler = self.profiler if self.profiler.enabled else None
+        if profiler:
+            profiler.begin_frame()
+        if self.low_latency_input:
+            # Sample input last, right before the simulation runs
+            self.update_audio()
+            if profiler:
+                profiler.lap("audio")
+            running = self.handle_events()
+            if profiler:
+                profiler.lap("events")
+        else:
+            running = self.handle_events()
+            if profiler:
+                profiler.lap("events")
+            self.update_audio()
+            if profiler:
+                profiler.lap("audio")
+        
+        if self.headless:
+            if not self.replay_finished():
+                self.tick()
+            self.voices.flush()
+            if profiler:
+                profiler.lap("sim")
+        else:
+            if self.pipeline is not None:
+                # Simulate the next frame on the worker while this one is drawn
+                future = self.pipeline.submit(self.simulate_frame)
+                frame = self.pending_frame
+            else:
+                frame = self.simulate_frame()
+                if profiler:
+                    profiler.lap("sim")
             
-            # Draw top text
-            self.print_top_text()
+            if frame is not None:
+                self.render(frame)
+                if profiler:
+                    profiler.lap("draw")
+                    if profiler.visible:
+                        self.mark(profiler.draw(self.window))
+                        profiler.lap("overlay")
+                
+                self.present()
+                self.latency.record((time.perf_counter() - frame.input_time) * 1000)
+                if profiler:
+                    profiler.lap("present")
+                
+                if self.frame_capture is not None:
+                    # The snapshot's tick: when pipelined, the worker is already past it
+                    self.frame_capture.grab(self.display, self.frame_count, frame.tick, self.latency.last)
+                    if profiler:
+                        profiler.lap("capture")
+                
+                self.startup.first_frame()
             
-            # Update display
-            pygame.display.flip()
+            if self.pipeline is not None:
+                # Time spent waiting on the worker is charged to "sim"
+                self.pending_frame = future.result()
+                if profiler:
+                    profiler.lap("sim")
             
             # Cap framerate
-            self.clock.tick(config.TARGET_FPS)
+            self.pacer.wait()
+            if profiler:
+                profiler.lap("wait")
+        
+        if profiler:
+            profiler.end_frame()
+        if self.frame_count == 0:
+            self.startup.first_frame()
+        self.frame_count += 1
+        if self.replay_finished():
+            running = False
+        return running
+    
+    def simulate_frame(self):
+        """
+        Runs as many fixed ticks as real time has covered, starts the frame's
+        sounds and returns a snapshot of the result to draw.
+        """
+        now = self.real_time_ms()
+        self.accumulator += min(now - self.last_frame_ticks, config.MAX_FRAME_TIME) * self.time_scale
+        self.last_frame_ticks = now
+        while self.accumulator >= self.tick_ms and not self.replay_finished():
+            self.tick()
+            self.accumulator -= self.tick_ms
+        self.alpha = self.accumulator / self.tick_ms
+        
+        # Start this frame's sounds together so repeats can merge
+        self.voices.flush()
+        return self.capture()
+    
+    def replay_finished(self):
+        """Returns True if a replay is running and has reached its end."""
+        return self.replay is not None and self.replay.finished(self.tick_count)
+    
+    def export_profile(self, path=None):
+        """Writes the profiler's recent frames to a CSV file and returns its path."""
+        if path is None:
+            path = time.strftime("profile-%Y%m%d-%H%M%S.csv")
+        count = self.profiler.export_csv(path)
+        print(f"Wrote {count} profiled frames to {path}")
+        return path
+    
+    def real_time_ms(self):
+        """Returns a monotonic wall-clock time in milliseconds."""
+        return time.perf_counter() * 1000
+    
+    def run(self, frames=None):
+        """Main game loop. Stops after the given number of frames if set."""
+        # Music starts once the background loader has it ready
+        self.music_playing = not self.headless
+        
+        self.last_frame_ticks = self.real_time_ms()
+        running = True
         
+        while running:
+            running = self.step()
+            if frames is not None and self.frame_count >= frames:
+                running = False
+        
+        if self.pipeline is not None:
+            self.pipeline.shutdown()
+        if self.recorder is not None:
+            self.recorder.close(self.tick_count)
+        if self.frame_capture is not None:
+            self.frame_capture.close()
+        
+        # Don't shut pygame down under the audio loader
+        self.loads.wait_for_audio()
         pygame.quit()
-
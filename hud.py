@@ -0,0 +1,132 @@
+"""
+HUD compositing: a cache of rendered text and a pre-drawn layer holding the
+HUD elements that change rarely.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class TextCache:
+    """
+    Least-recently-used cache of rendered text surfaces, keyed by font,
+    string, colour and antialiasing, holding at most maxsize entries.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Returns font.render(text, antialias, color), reusing a cached surface if there is one."""
+        key = (font, text, tuple(color), antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return surface
+
+
+class HudCompositor:
+    """
+    Draws the zone and music text, force field and bases onto one cached
+    strip along the bottom of the window, and the health bar onto a small
+    cached surface.
+
+    The strip is redrawn only when its state (the text surfaces, force
+    field colour and layout) changes. Each frame it is blitted in one go, or
+    with dirty rectangles only the parts that were cleared under last
+    frame's sprites are restored from it.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.strip = None
+        self.strip_rect = None
+        self.strip_key = None
+        self.health_surface = None
+        self.health_key = None
+        self.redraws = 0
+
+    def invalidate(self):
+        """Forces the strip to be redrawn, after the layout has changed."""
+        self.strip_key = None
+
+    def state(self):
+        """
+        Returns what the strip shows: each element's surface (None for the
+        force field) and a copy of its rect, then the force field colour.
+        """
+        game = self.game
+        loads = game.get_loads()
+        return (
+            (loads.level_text, loads.level_text.get_rect(topleft=loads.level_text_pos)),
+            (loads.music_text, loads.music_text.get_rect(topleft=loads.music_text_pos)),
+            (None, pygame.Rect(game.force_rect)),
+            (game.lbase_image, pygame.Rect(game.lbase_rect)),
+            (game.rbase_image, pygame.Rect(game.rbase_rect)),
+            tuple(game.force_color),
+        )
+
+    def _compose(self, state):
+        """Redraws the cached strip from a state."""
+        pieces = state[:-1]
+        force_color = state[-1]
+        area = pieces[0][1].unionall([rect for _, rect in pieces[1:]])
+        strip_rect = pygame.Rect(0, area.top, self.game.window.get_width(), area.height)
+        if self.strip is None or self.strip.get_size() != strip_rect.size:
+            self.strip = pygame.Surface(strip_rect.size).convert()
+        self.strip.fill((0, 0, 0))
+        for image, rect in pieces:
+            rect = rect.move(0, -strip_rect.top)
+            if image is None:
+                self.strip.fill(force_color, rect)
+            else:
+                self.strip.blit(image, rect)
+        self.strip_rect = strip_rect
+        self.redraws += 1
+
+    def draw(self, surface, dirty_rects=None, state=None):
+        """
+        Draws the strip for state (the current state if not given), redrawing
+        it first if that changed. Returns the rect that has to be presented,
+        or None when only areas already being presented were touched.
+        """
+        if state is None:
+            state = self.state()
+        changed = state != self.strip_key
+        if changed:
+            self._compose(state)
+            self.strip_key = state
+        if dirty_rects is None or changed or dirty_rects.full_redraw:
+            return surface.blit(self.strip, self.strip_rect)
+        # Restore only what last frame's sprites covered
+        strip_rect = self.strip_rect
+        for rect in dirty_rects.previous:
+            clipped = rect.clip(strip_rect)
+            if clipped:
+                surface.blit(self.strip, clipped, clipped.move(0, -strip_rect.top))
+        return None
+
+    def health_bar(self, size, green_width):
+        """
+        Returns the health bar as one surface, rebuilt only when the hp shown
+        changes. A new surface is made each time, so one handed out earlier
+        is never drawn over.
+        """
+        key = (tuple(size), green_width)
+        if key != self.health_key:
+            self.health_surface = pygame.Surface(size).convert()
+            self.health_surface.fill((255, 0, 0))
+            self.health_surface.fill((0, 255, 0), (0, 0, green_width, size[1]))
+            self.health_key = key
+        return self.health_surface
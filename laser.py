@@ -2,6 +2,7 @@
 Laser projectile class.
 """
 
+import pygame
 import config
 from subsprite import SubSprite
 
@@ -11,8 +12,16 @@ class Laser(SubSprite):
     Laser projectile shot upward from the freighter ship.
     """
     
+    __slots__ = ("move_delay", "swept")
+    
     def __init__(self, game):
         super().__init__()
+        self.swept = pygame.Rect(0, 0, 0, 0)
+        self.reset(game)
+    
+    def reset(self, game):
+        """Sets the laser up as a new shot, so a pooled one can be reused."""
+        self.reset_sprite()
         self.set_game(game)
         
         self.atk = config.LASER_DAMAGE
@@ -22,7 +31,7 @@ class Laser(SubSprite):
         
         # Set texture
         self.image = game.get_loads().tex_laser
-        self.rect = self.image.get_rect()
+        self.rect.size = self.image.get_size()
         
         # Position at freighter's position
         freighter = game.get_freighter()
@@ -32,12 +41,12 @@ class Laser(SubSprite):
         )
         
         # Play laser sound
-        sound = game.get_loads().laser_buffer
-        sound.set_volume(config.SOUND_LASER_VOLUME)
-        sound.play()
+        game.play_sound(game.get_loads().laser_buffer, "laser", config.SOUND_LASER_VOLUME)
     
     def update(self):
         """Update laser position and check if off-screen."""
+        self.begin_step()
+        
         # Check if off-screen
         if self.rect.y + self.rect.height < 0:
             self.alive = False
@@ -50,4 +59,19 @@ class Laser(SubSprite):
             self.last_move_time = current_time
         
         self.set_rect()
+    
+    def swept_rect(self):
+        """
+        Returns the rect covering everything the laser passed through this
+        step. The same rect is reused on every call.
+        """
+        start_y = round(self.prev_y)
+        top = min(start_y, self.rect.y)
+        bottom = max(start_y, self.rect.y) + self.rect.height
+        self.swept.update(self.rect.x, top, self.rect.width, bottom - top)
+        return self.swept
+    
+    def swept_mask(self):
+        """Returns the collision mask matching the last swept_rect."""
+        return self.game.get_loads().swept_mask(self.image, self.swept.height - self.rect.height)
 
@@ -4,77 +4,252 @@ Resource manager for loading all game assets (images, sounds, fonts).
 
 import pygame
 import os
+import threading
+import time
+import config
+from asset_cache import AssetCache, surface_format
+from hud import TextCache
+
+
+# Sprite name, file name and whether the top-left colour is see-through.
+# Each sprite is exposed as Loads.tex_<name>.
+SPRITE_FILES = (
+    ("crate", "crate.png", True),
+    ("freighter", "falcon.png", True),
+    ("freighter_blink", "falcon_shield.png", True),
+    ("laser", "laser.png", True),
+    ("lg_rock", "lg_rock.png", True),
+    ("lg_rock2", "lg_rock_damaged.png", True),
+    ("md_rock", "md_rock.png", True),
+    ("sm_rock", "sm_rock.png", True),
+    ("lg_explode", "lg_explode.png", True),
+    ("sm_explode", "sm_explode.png", True),
+    ("lbase", "lbase.png", False),
+    ("rbase", "rbase.png", False),
+)
+
+# Gap between sprites packed into an atlas (pixels)
+ATLAS_PADDING = 1
+ATLAS_MAX_WIDTH = 512
+
+
+def _needs_alpha(image, masked):
+    """
+    Returns True if a freshly loaded image needs a real alpha channel:
+    it has partly or fully transparent pixels, or a colorkey of its own that
+    differs from the top-left colour used as the mask.
+    """
+    if image.get_flags() & pygame.SRCALPHA:
+        # Threshold 254 keeps only fully opaque pixels
+        opaque = pygame.mask.from_surface(image, 254).count()
+        if opaque != image.get_width() * image.get_height():
+            return True
+    colorkey = image.get_colorkey()
+    if colorkey is not None:
+        if not masked or image.get_width() == 0 or colorkey != image.get_at((0, 0)):
+            return True
+    return False
+
+
+def _key_to_alpha(image):
+    """
+    Returns an alpha copy of a masked image with every pixel of its top-left
+    colour made fully transparent, so it needs no colorkey on top of alpha.
+    """
+    image = image.convert_alpha()
+    if image.get_width() and image.get_height():
+        key = pygame.mask.from_threshold(image, image.get_at((0, 0)), (1, 1, 1, 255))
+        key.to_surface(image, setcolor=(0, 0, 0, 0), unsetcolor=None)
+    return image
+
+
+def _blank_atlas(size, alpha):
+    """Returns a cleared display-format surface for an atlas."""
+    if alpha:
+        atlas = pygame.Surface(size, pygame.SRCALPHA).convert_alpha()
+        atlas.fill((0, 0, 0, 0))
+    else:
+        atlas = pygame.Surface(size).convert()
+        atlas.fill((0, 0, 0))
+    return atlas
+
+
+def _build_atlas(images, alpha):
+    """
+    Packs (name, image) pairs into one display-format surface using shelf
+    packing, tallest first. Returns the atlas and a dict of name -> Rect.
+    """
+    if not images:
+        return None, {}
+    order = sorted(images, key=lambda item: item[1].get_height(), reverse=True)
+    width = max(ATLAS_MAX_WIDTH, max(image.get_width() for _, image in order))
+    rects = {}
+    x = y = shelf_height = 0
+    for name, image in order:
+        w, h = image.get_size()
+        if x + w > width:
+            x = 0
+            y += shelf_height + ATLAS_PADDING
+            shelf_height = 0
+        rects[name] = pygame.Rect(x, y, w, h)
+        x += w + ATLAS_PADDING
+        shelf_height = max(shelf_height, h)
+    height = y + shelf_height
+    
+    atlas = _blank_atlas((width, height), alpha)
+    for name, image in order:
+        if alpha:
+            # Max-blend onto the cleared atlas copies RGBA values unchanged
+            atlas.blit(image.convert_alpha(), rects[name], special_flags=pygame.BLEND_RGBA_MAX)
+        else:
+            # Copy every pixel, including any colour the file marks as see-through
+            image.set_colorkey(None)
+            atlas.blit(image, rects[name])
+    return atlas, rects
+
+
+# Fonts, created on first use: attribute name -> point size
+FONT_SIZES = {
+    "game_font1": 36,
+    "game_font_large": 75,
+    "game_font_medium": 40,
+    "game_font_small": 20,
+    "game_font_tiny": 15,
+}
+
+# Sounds loaded in the background: attribute name -> file name
+SOUND_FILES = (
+    ("level_start", "level_start.wav"),
+    ("laser_buffer", "laser.wav"),
+    ("boom_buffer", "boom.wav"),
+    ("shield_hit_buffer", "shield_hit.wav"),
+    ("collect_crate_buffer", "crate_collected.wav"),
+    ("force_field_buffer", "zap.wav"),
+)
+
+# End-screen text surfaces and positions, rendered on first use
+END_SCREEN_TEXTS = (
+    "lose_text", "restart_text", "win_text", "advance_text",
+    "congrats_text", "win_game_text", "play_again_text",
+)
+END_SCREEN_ATTRS = frozenset(END_SCREEN_TEXTS + tuple(name + "_pos" for name in END_SCREEN_TEXTS))
 
 
 class Loads:
     """
     Resource manager that loads and initializes all game assets.
+    
+    Images are loaded up front since the first frame needs them. The mixer,
+    sounds and music load on a background thread, and fonts and end-screen
+    text are created the first time they are used. Until a sound has
+    loaded its attribute reads as None.
     """
     
-    def __init__(self):
+    def __init__(self, startup=None):
         # Get the base directory (parent of this file)
         base_dir = os.path.dirname(os.path.abspath(__file__))
         assets_dir = os.path.join(base_dir, "assets")
         images_dir = os.path.join(assets_dir, "images")
         sounds_dir = os.path.join(assets_dir, "sounds")
+        self.startup = startup
         
-        # Initialize pygame mixer if not already initialized
-        if not pygame.mixer.get_init():
-            pygame.mixer.init()
+        # Cache of assets already converted for this display and mixer
+        self.cache = None
+        if config.USE_ASSET_CACHE:
+            self.cache = AssetCache(os.path.join(base_dir, config.ASSET_CACHE_DIR))
         
         # Load images and textures
         self._load_images(images_dir)
-        
-        # Load sounds
-        self._load_sounds(sounds_dir)
-        
-        # Load fonts (use default pygame font)
-        self.game_font1 = pygame.font.Font(None, 36)
-        self.game_font_large = pygame.font.Font(None, 75)
-        self.game_font_medium = pygame.font.Font(None, 40)
-        self.game_font_small = pygame.font.Font(None, 20)
-        self.game_font_tiny = pygame.font.Font(None, 15)
+        if self.cache is not None:
+            # Saved now so the atlases are kept even if the audio never loads
+            self.cache.save()
+        if startup is not None:
+            startup.mark("images")
         
         # Text surfaces will be created in game_text_config
         self.level_text = None
         self.music_text = None
-        self.lose_text = None
-        self.restart_text = None
-        self.win_text = None
-        self.advance_text = None
-        self.congrats_text = None
-        self.win_game_text = None
-        self.play_again_text = None
+        self.text_cache = TextCache(config.TEXT_CACHE_SIZE)
         
         self.game = None
+        
+        # Music (streaming), loaded with the sounds
+        self.techno_beat = os.path.join(sounds_dir, "music.wav")
+        self.music_loaded = False
+        
+        # Load the mixer, sounds and music in the background
+        self.audio_ready = threading.Event()
+        self.audio_thread = threading.Thread(target=self._load_audio, args=(sounds_dir,),
+                                             name="audio-loader", daemon=True)
+        self.audio_thread.start()
+    
+    def __getattr__(self, name):
+        """Creates fonts and end-screen text on first use; unloaded sounds read as None."""
+        if name in FONT_SIZES:
+            font = pygame.font.Font(None, FONT_SIZES[name])
+            setattr(self, name, font)
+            return font
+        if name in END_SCREEN_ATTRS:
+            self._render_end_screen()
+            return self.__dict__[name]
+        if any(name == attr for attr, _ in SOUND_FILES):
+            return None
+        raise AttributeError(f"'Loads' object has no attribute '{name}'")
+    
+    def wait_for_audio(self, timeout=None):
+        """Blocks until the background audio loader has finished."""
+        return self.audio_ready.wait(timeout)
     
     def _load_images(self, images_dir):
-        """Load all image files and create textures with transparency."""
-        # Helper function to load image with color key transparency
-        def load_image_with_mask(filename):
+        """
+        Load all sprites, pick the cheapest correct blit format for each and
+        pack them into texture atlases.
+        
+        Sprites that are fully opaque are converted to the display format
+        and, if masked, given an RLE-accelerated colorkey taken from their
+        top-left pixel. Only sprites with real per-pixel transparency keep an
+        alpha channel, with the mask colour of masked ones turned into zero
+        alpha rather than a colorkey. Each tex_* attribute is a subsurface of an atlas, and
+        atlas_rects maps sprite names to their place in it, and masks maps
+        each tex_* surface to its collision mask.
+        """
+        paths = []
+        for _, filename, _ in SPRITE_FILES:
             path = os.path.join(images_dir, filename)
             if not os.path.exists(path):
                 raise FileNotFoundError(f"Image not found: {path}")
-            image = pygame.image.load(path).convert_alpha()
-            # Set color key to top-left pixel (like SFML CreateMaskFromColor)
-            if image.get_width() > 0 and image.get_height() > 0:
-                color_key = image.get_at((0, 0))
-                image.set_colorkey(color_key)
-            return image
-        
-        # Load all textures
-        self.tex_crate = load_image_with_mask("crate.png")
-        self.tex_freighter = load_image_with_mask("falcon.png")
-        self.tex_freighter_blink = load_image_with_mask("falcon_shield.png")
-        self.tex_laser = load_image_with_mask("laser.png")
-        self.tex_lg_rock = load_image_with_mask("lg_rock.png")
-        self.tex_lg_rock2 = load_image_with_mask("lg_rock_damaged.png")
-        self.tex_md_rock = load_image_with_mask("md_rock.png")
-        self.tex_sm_rock = load_image_with_mask("sm_rock.png")
-        self.tex_lg_explode = load_image_with_mask("lg_explode.png")
-        self.tex_sm_explode = load_image_with_mask("sm_explode.png")
-        self.tex_lbase = pygame.image.load(os.path.join(images_dir, "lbase.png")).convert_alpha()
-        self.tex_rbase = pygame.image.load(os.path.join(images_dir, "rbase.png")).convert_alpha()
+            paths.append(path)
+        
+        atlases = None
+        if self.cache is not None:
+            target = "{}|{}".format(surface_format(pygame.Surface((1, 1)).convert()),
+                                    surface_format(pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()))
+            key = self.cache.key(paths, target)
+            atlases = self._load_cached_atlases(key)
+        if atlases is None:
+            atlases = self._build_atlases(paths)
+            if self.cache is not None:
+                self._store_cached_atlases(key, *atlases)
+        self.atlas, opaque_rects, self.alpha_atlas, alpha_rects = atlases
+        self.atlas_rects = {**opaque_rects, **alpha_rects}
+        
+        self.sprite_formats = {}
+        self.masks = {}
+        self.swept_masks = {}
+        for name, _, masked in SPRITE_FILES:
+            if name in alpha_rects:
+                # Masked sprites had their key colour turned into zero alpha
+                surface = self.alpha_atlas.subsurface(alpha_rects[name])
+                self.sprite_formats[name] = "alpha"
+            else:
+                surface = self.atlas.subsurface(opaque_rects[name])
+                if masked:
+                    surface.set_colorkey(surface.get_at((0, 0)), pygame.RLEACCEL)
+                    self.sprite_formats[name] = "colorkey+rle"
+                else:
+                    self.sprite_formats[name] = "opaque"
+            setattr(self, "tex_" + name, surface)
+            self.masks[surface] = pygame.mask.from_surface(surface)
         
         # Game icon (for window icon if needed)
         icon_path = os.path.join(images_dir, "..", "icon.png")
@@ -85,18 +260,133 @@ class Loads:
             self.img_game_icon = pygame.Surface((32, 32))
             self.img_game_icon.fill((100, 100, 200))
     
-    def _load_sounds(self, sounds_dir):
-        """Load all sound files."""
-        self.boom_buffer = pygame.mixer.Sound(os.path.join(sounds_dir, "boom.wav"))
-        self.laser_buffer = pygame.mixer.Sound(os.path.join(sounds_dir, "laser.wav"))
-        self.shield_hit_buffer = pygame.mixer.Sound(os.path.join(sounds_dir, "shield_hit.wav"))
-        self.collect_crate_buffer = pygame.mixer.Sound(os.path.join(sounds_dir, "crate_collected.wav"))
-        self.force_field_buffer = pygame.mixer.Sound(os.path.join(sounds_dir, "zap.wav"))
-        self.level_start = pygame.mixer.Sound(os.path.join(sounds_dir, "level_start.wav"))
+    def swept_mask(self, image, distance):
+        """
+        Returns the mask of image smeared down over distance pixels, covering
+        everything a sprite moving that far along y in one step passed over.
+        """
+        key = (image, distance)
+        mask = self.swept_masks.get(key)
+        if mask is None:
+            source = self.masks[image]
+            width, height = source.get_size()
+            mask = pygame.Mask((width, height + distance))
+            for offset in range(distance + 1):
+                mask.draw(source, (0, offset))
+            self.swept_masks[key] = mask
+        return mask
+    
+    def _build_atlases(self, paths):
+        """
+        Decodes every sprite and packs it into the opaque or the alpha atlas.
+        Returns (atlas, rects, alpha_atlas, alpha_rects).
+        """
+        raw_images = {}
+        for (name, _, masked), path in zip(SPRITE_FILES, paths):
+            raw_images[name] = (pygame.image.load(path), masked)
+        
+        opaque_names = [name for name, (image, masked) in raw_images.items()
+                        if not _needs_alpha(image, masked)]
+        alpha_names = [name for name in raw_images if name not in opaque_names]
         
-        # Music (streaming)
-        music_path = os.path.join(sounds_dir, "music.wav")
-        self.techno_beat = music_path  # Store path for pygame.mixer.music
+        atlas, rects = _build_atlas(
+            [(name, raw_images[name][0]) for name in opaque_names], alpha=False)
+        alpha_images = []
+        for name in alpha_names:
+            image, masked = raw_images[name]
+            alpha_images.append((name, _key_to_alpha(image) if masked else image))
+        alpha_atlas, alpha_rects = _build_atlas(alpha_images, alpha=True)
+        return atlas, rects, alpha_atlas, alpha_rects
+    
+    def _load_cached_atlases(self, key):
+        """Returns the atlases from the asset cache, or None if they must be rebuilt."""
+        atlases = []
+        for name, alpha in (("atlas", False), ("alpha_atlas", True)):
+            cached = self.cache.load_surface(name, key, lambda size: _blank_atlas(size, alpha))
+            if cached is None:
+                return None
+            surface, meta = cached
+            rects = {sprite: pygame.Rect(rect) for sprite, rect in meta["rects"].items()}
+            atlases.extend((surface if rects else None, rects))
+        return tuple(atlases)
+    
+    def _store_cached_atlases(self, key, atlas, rects, alpha_atlas, alpha_rects):
+        """Writes both atlases and their sprite rects to the asset cache."""
+        for name, surface, alpha, sprite_rects in (("atlas", atlas, False, rects),
+                                                   ("alpha_atlas", alpha_atlas, True, alpha_rects)):
+            if surface is None:
+                # Store an empty stand-in so a hit still means both atlases are known
+                surface = _blank_atlas((1, 1), alpha)
+            meta = {"rects": {sprite: list(rect) for sprite, rect in sprite_rects.items()}}
+            self.cache.store_surface(name, key, surface, meta)
+    
+    def blit_report(self, repeats=200):
+        """
+        Time blitting each sprite onto a display-format surface.
+        Returns (name, size, format, microseconds per blit) rows, costliest first.
+        """
+        target = pygame.display.get_surface().copy()
+        rows = []
+        for name, _, _ in SPRITE_FILES:
+            surface = getattr(self, "tex_" + name)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                target.blit(surface, (0, 0))
+            micros = (time.perf_counter() - start) * 1e6 / repeats
+            rows.append((name, surface.get_size(), self.sprite_formats[name], micros))
+        rows.sort(key=lambda row: row[3], reverse=True)
+        return rows
+    
+    def format_blit_report(self, repeats=200):
+        """Returns the blit report as printable text."""
+        lines = ["sprite             size       format          us/blit"]
+        for name, (width, height), blit_format, micros in self.blit_report(repeats):
+            lines.append(f"{name:<18} {width:>4}x{height:<5} {blit_format:<15} {micros:7.2f}")
+        return "\n".join(lines)
+    
+    def _load_audio(self, sounds_dir):
+        """Background thread: start the mixer, then load every sound and the music."""
+        began = time.perf_counter()
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            self._mark_background("mixer init", began)
+            
+            began = time.perf_counter()
+            for attr, filename in SOUND_FILES:
+                setattr(self, attr, self._load_sound(os.path.join(sounds_dir, filename)))
+            self._mark_background("sounds", began)
+            
+            began = time.perf_counter()
+            if os.path.exists(self.techno_beat):
+                pygame.mixer.music.load(self.techno_beat)
+                self.music_loaded = True
+            self._mark_background("music", began)
+        except pygame.error:
+            # No audio device: play on without sound
+            pass
+        finally:
+            if self.cache is not None:
+                self.cache.save()
+                self.cache.close()
+            self.audio_ready.set()
+    
+    def _mark_background(self, phase, began):
+        if self.startup is not None:
+            self.startup.mark_background(phase, began)
+    
+    def _load_sound(self, path):
+        """Load a sound, from raw mixer-rate samples in the asset cache when possible."""
+        if self.cache is None:
+            return pygame.mixer.Sound(path)
+        name = "sound_" + os.path.splitext(os.path.basename(path))[0]
+        key = self.cache.key([path], str(pygame.mixer.get_init()))
+        cached = self.cache.load(name, key)
+        if cached is not None:
+            return pygame.mixer.Sound(buffer=cached[0])
+        sound = pygame.mixer.Sound(path)
+        self.cache.store(name, key, sound.get_raw(), {})
+        return sound
     
     def game_text_config(self, game):
         """Configure all text surfaces based on game window dimensions."""
@@ -105,13 +395,18 @@ class Loads:
         window_height = game.window.get_height()
         
         # Level text
-        self.level_text = self.game_font_small.render("Zone: 1", True, (255, 255, 255))
+        self.level_text = self.text_cache.render(self.game_font_small, "Zone: 1", (255, 255, 255))
         self.level_text_pos = (60, window_height - self.level_text.get_height() - 10)
         
         # Music text
-        self.music_text = self.game_font_tiny.render("Music: Playing | F12", True, (255, 255, 255))
+        self.music_text = self.text_cache.render(self.game_font_tiny, "Music: Playing | F12", (255, 255, 255))
         self.music_text_pos = (window_width - self.music_text.get_width() - 60,
                                window_height - self.music_text.get_height() - 10)
+    
+    def _render_end_screen(self):
+        """Render the win, lose and congratulations text."""
+        window_width = self.game.window.get_width()
+        window_height = self.game.window.get_height()
         
         # Lose text
         self.lose_text = self.game_font_large.render("You Lose!", True, (255, 255, 255))
@@ -150,10 +445,10 @@ class Loads:
     
     def update_level_text(self, level):
         """Update the level text with the current level number."""
-        self.level_text = self.game_font_small.render(f"Zone: {level}", True, (255, 255, 255))
+        self.level_text = self.text_cache.render(self.game_font_small, f"Zone: {level}", (255, 255, 255))
     
     def update_music_text(self, playing):
         """Update the music status text."""
         status = "Playing" if playing else "Stopped"
-        self.music_text = self.game_font_tiny.render(f"Music: {status} | F12", True, (255, 255, 255))
+        self.music_text = self.text_cache.render(self.game_font_tiny, f"Music: {status} | F12", (255, 255, 255))
 
@@ -2,19 +2,98 @@
 Main entry point for the Freighter game.
 """
 
-import random
+import argparse
+import config
 from game import Game
+from replay import read_header
+
+
+def parse_args():
+    """Parses command-line options."""
+    parser = argparse.ArgumentParser(description="Freighter")
+    parser.add_argument("--headless", action="store_true",
+                        help="simulate without a display, sound or frame cap")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="stop after this many frames")
+    parser.add_argument("--blit-report", action="store_true",
+                        help="print the measured blit cost of each sprite at startup")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print time to first frame broken down by startup phase")
+    parser.add_argument("--pool-report", action="store_true",
+                        help="print entity pool hits, misses and high water marks on exit")
+    parser.add_argument("--profile", action="store_true",
+                        help="start with the frame profiler overlay shown (toggle with F3)")
+    parser.add_argument("--profile-csv", metavar="PATH", default=None,
+                        help="record per-stage frame timings and write the last frames to PATH on exit")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="seed for the game's random numbers (random if not given)")
+    parser.add_argument("--record", metavar="PATH", default=None,
+                        help="record the seed and every gameplay input to PATH")
+    parser.add_argument("--replay", metavar="PATH", default=None,
+                        help="play back a recording made with --record, then exit")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="replay this many times faster than real time (headless runs flat out)")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="read input after pumping events, just before the simulation step")
+    parser.add_argument("--pacing", choices=("sleep", "precise", "busy"), default=None,
+                        help="how to wait out each frame (default: FRAME_PACING)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate the next frame on a worker thread while the last one is drawn")
+    parser.add_argument("--capture", metavar="PATH", default=None,
+                        help="write every presented frame with its timing to PATH")
+    parser.add_argument("--latency-report", action="store_true",
+                        help="print input-to-present latency percentiles on exit")
+    return parser.parse_args()
 
 
 def main():
-    """Initialize random seed and start the game."""
-    random.seed()
+    """
+    Parses the options and runs a seeded game, recording its input or
+    replaying a recording in place of the player when asked, then prints
+    the requested reports.
+    """
+    args = parse_args()
+    seed = args.seed
+    if args.replay:
+        # Rebuild the game exactly as it was recorded
+        header = read_header(args.replay)
+        seed = header.seed
+        config.WINDOW_WIDTH = header.width
+        config.WINDOW_HEIGHT = header.height
+        config.LOGICAL_RESOLUTION = (header.width, header.height)
+        config.USE_FULLSCREEN = False
+    if args.low_latency:
+        config.LOW_LATENCY_INPUT = True
+    if args.pacing:
+        config.FRAME_PACING = args.pacing
+    if args.pipelined:
+        config.PIPELINED_RENDER = True
     
     # Create and run the game
-    game = Game()
-    game.run()
+    game = Game(headless=args.headless, seed=seed)
+    game.startup.print_report = args.startup_report
+    if args.blit_report:
+        print(game.get_loads().format_blit_report())
+    if args.replay:
+        game.start_replay(args.replay, args.replay_speed)
+    elif args.record:
+        game.start_recording(args.record)
+    if args.capture:
+        game.start_capture(args.capture)
+    if args.profile:
+        game.profiler.toggle()
+    if args.profile_csv:
+        game.profiler.enabled = True
+    game.run(frames=args.frames)
+    if args.profile_csv:
+        game.export_profile(args.profile_csv)
+    if args.pool_report:
+        print(game.format_pool_report())
+    if args.latency_report:
+        print(game.latency.format())
+    if game.frame_capture is not None:
+        print(game.frame_capture.format())
 
 
 if __name__ == "__main__":
     main()
-
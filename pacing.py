@@ -0,0 +1,77 @@
+"""
+Frame pacing and input-to-present latency measurement.
+"""
+
+import time
+from collections import deque
+
+import pygame
+
+
+class FramePacer:
+    """
+    Waits out the rest of each frame to hold a target frame rate.
+
+    "sleep" uses Clock.tick, which sleeps with about a millisecond of
+    granularity and can overshoot. "busy" spins until the deadline.
+    "precise" sleeps until spin_ms before the deadline and spins the rest,
+    so it is nearly as exact as "busy" without holding a core the whole
+    frame.
+    """
+
+    def __init__(self, mode, fps, spin_ms=2.0):
+        self.mode = mode
+        self.period = 1.0 / fps
+        self.fps = fps
+        self.spin = spin_ms / 1000
+        self.clock = pygame.time.Clock()
+        self.deadline = None
+
+    def wait(self):
+        """Blocks until the current frame's time is up."""
+        if self.mode == "sleep":
+            self.clock.tick(self.fps)
+            return
+        if self.mode == "busy":
+            self.clock.tick_busy_loop(self.fps)
+            return
+        now = time.perf_counter()
+        if self.deadline is None or now - self.deadline > self.period:
+            # First frame, or too far behind to catch up
+            self.deadline = now + self.period
+        remaining = self.deadline - now - self.spin
+        if remaining > 0:
+            time.sleep(remaining)
+        while time.perf_counter() < self.deadline:
+            pass
+        self.deadline += self.period
+
+
+class LatencyStats:
+    """Keeps the last size input-to-present latencies in milliseconds."""
+
+    def __init__(self, size):
+        self.samples = deque(maxlen=size)
+        self.last = 0.0
+
+    def record(self, ms):
+        """Adds one frame's latency."""
+        self.samples.append(ms)
+        self.last = ms
+
+    def percentile(self, pct):
+        """Returns the nearest-rank percentile of the kept samples."""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def format(self):
+        """Returns a one-line summary."""
+        if not self.samples:
+            return "input to present: no frames presented"
+        mean = sum(self.samples) / len(self.samples)
+        return (f"input to present over {len(self.samples)} frames: mean {mean:.2f} ms  "
+                f"p50 {self.percentile(50):.2f}  p95 {self.percentile(95):.2f}  "
+                f"p99 {self.percentile(99):.2f}  max {max(self.samples):.2f}")
@@ -0,0 +1,190 @@
+"""
+Optional NumPy-backed particle system for explosion sparks and debris.
+
+Every particle lives in a set of flat arrays, so the whole lot is moved,
+aged and drawn in a handful of array operations per frame however many
+there are. Particles are purely visual: they draw from their own random
+generator and never touch the simulation, so recordings and seeded runs play
+out the same with or without them.
+"""
+
+import math
+
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def available():
+    """Returns True if NumPy is installed and particles can be used."""
+    return np is not None
+
+
+class Emitter:
+    """
+    How one kind of particle is thrown out: a speed range in pixels per
+    second, a lifetime range in milliseconds and the colours to pick from.
+    """
+
+    def __init__(self, speed, life, colors):
+        self.speed = speed
+        self.life = life
+        self.colors = colors
+
+
+class ParticleSystem:
+    """
+    Structure-of-arrays store for up to capacity particles.
+
+    Live particles are kept packed at the front of the arrays in the order
+    they were emitted; dead ones are squeezed out after each step. Each
+    burst gets an id so draw can return one dirty rect per burst rather than
+    one per particle. Bursts past capacity are cut short and counted in
+    dropped.
+    """
+
+    def __init__(self, capacity, size=1, gravity=0.0, drag=1.0, seed=None):
+        self.capacity = capacity
+        self.size = size
+        self.gravity = gravity
+        self.drag = drag
+        self.rng = np.random.default_rng(seed)
+        self.count = 0
+        self.next_burst = 0
+        self.emitted = 0
+        self.dropped = 0
+
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.prev_x = np.zeros(capacity, dtype=np.float32)
+        self.prev_y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.max_life = np.ones(capacity, dtype=np.float32)
+        self.color = np.zeros((capacity, 3), dtype=np.float32)
+        self.burst_id = np.zeros(capacity, dtype=np.int64)
+
+    def burst(self, x, y, emitters):
+        """Throws out particles from (x, y) for each (Emitter, count) pair as one burst."""
+        for emitter, count in emitters:
+            self._emit(x, y, emitter, count)
+        self.next_burst += 1
+
+    def _emit(self, x, y, emitter, count):
+        """Appends count particles from one emitter to the current burst."""
+        n = min(count, self.capacity - self.count)
+        self.dropped += count - max(n, 0)
+        if n <= 0:
+            return
+        i, j = self.count, self.count + n
+        rng = self.rng
+        angle = rng.uniform(0.0, 2 * math.pi, n)
+        speed = rng.uniform(emitter.speed[0], emitter.speed[1], n)
+        self.x[i:j] = self.prev_x[i:j] = x
+        self.y[i:j] = self.prev_y[i:j] = y
+        self.vx[i:j] = np.cos(angle) * speed
+        self.vy[i:j] = np.sin(angle) * speed
+        self.life[i:j] = self.max_life[i:j] = rng.uniform(emitter.life[0], emitter.life[1], n) / 1000
+        palette = np.asarray(emitter.colors, dtype=np.float32)
+        self.color[i:j] = palette[rng.integers(0, len(palette), n)]
+        self.burst_id[i:j] = self.next_burst
+        self.count = j
+        self.emitted += n
+
+    def seed(self, seed):
+        """Restarts the random stream bursts are drawn from."""
+        self.rng = np.random.default_rng(seed)
+
+    def clear(self):
+        """Removes every particle."""
+        self.count = 0
+
+    def step(self, dt):
+        """Moves and ages every particle by dt seconds, then drops the dead ones."""
+        n = self.count
+        if not n:
+            return
+        x, y = self.x[:n], self.y[:n]
+        vx, vy = self.vx[:n], self.vy[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        vy += self.gravity * dt
+        keep = self.drag ** dt
+        vx *= keep
+        vy *= keep
+        x += vx * dt
+        y += vy * dt
+        life = self.life[:n]
+        life -= dt
+
+        alive = life > 0
+        if not alive.all():
+            index = np.flatnonzero(alive)
+            k = len(index)
+            for array in (self.x, self.y, self.prev_x, self.prev_y, self.vx, self.vy,
+                          self.life, self.max_life, self.color, self.burst_id):
+                array[:k] = array[index]
+            self.count = k
+
+    def snapshot(self, alpha, width, height):
+        """
+        Returns copies of what draw needs for the particles inside a width by
+        height target: positions alpha of the way between their last two,
+        colours faded towards black with age, and burst ids. Returns None
+        when nothing is inside.
+        """
+        n = self.count
+        if not n:
+            return None
+        size = self.size
+        prev_x, prev_y = self.prev_x[:n], self.prev_y[:n]
+        px = (prev_x + (self.x[:n] - prev_x) * alpha).astype(np.int32)
+        py = (prev_y + (self.y[:n] - prev_y) * alpha).astype(np.int32)
+        inside = (px >= 0) & (py >= 0) & (px <= width - size) & (py <= height - size)
+        if not inside.any():
+            return None
+        fade = self.life[:n][inside] / self.max_life[:n][inside]
+        rgb = (self.color[:n][inside] * fade[:, None]).astype(np.uint32)
+        return px[inside], py[inside], rgb, self.burst_id[:n][inside]
+
+    def draw(self, surface, alpha=1.0, snapshot=None):
+        """
+        Draws the particles of snapshot, or of a fresh one taken at alpha,
+        with one write into the surface's pixels per square offset. Returns a
+        rect around each burst drawn.
+        """
+        size = self.size
+        if snapshot is None:
+            snapshot = self.snapshot(alpha, *surface.get_size())
+        if snapshot is None:
+            return []
+        px, py, rgb, bursts = snapshot
+
+        if surface.get_bytesize() in (2, 4):
+            shifts = surface.get_shifts()
+            losses = surface.get_losses()
+            mapped = ((rgb[:, 0] >> losses[0]) << shifts[0] |
+                      (rgb[:, 1] >> losses[1]) << shifts[1] |
+                      (rgb[:, 2] >> losses[2]) << shifts[2])
+            pixels = pygame.surfarray.pixels2d(surface)
+            for dx in range(size):
+                for dy in range(size):
+                    pixels[px + dx, py + dy] = mapped
+            del pixels
+        else:
+            # surfarray cannot write 24-bit surfaces directly
+            for x, y, color in zip(px.tolist(), py.tolist(), rgb.tolist()):
+                surface.fill(color, (x, y, size, size))
+
+        # One rect per burst; bursts are contiguous since order is kept
+        starts = np.flatnonzero(np.r_[True, bursts[1:] != bursts[:-1]])
+        left = np.minimum.reduceat(px, starts).tolist()
+        top = np.minimum.reduceat(py, starts).tolist()
+        right = np.maximum.reduceat(px, starts).tolist()
+        bottom = np.maximum.reduceat(py, starts).tolist()
+        return [pygame.Rect(l, t, r - l + size, b - t + size)
+                for l, t, r, b in zip(left, top, right, bottom)]
@@ -0,0 +1,54 @@
+"""
+Object pools so short-lived entities are reused instead of rebuilt.
+"""
+
+
+class EntityPool:
+    """
+    Free list of entities of one class.
+
+    acquire(*args) reuses a released entity through its reset(*args) method,
+    or builds a new one with cls(*args) when the pool is empty. At most limit
+    released entities are kept; any beyond that are left to the garbage
+    collector.
+    """
+
+    def __init__(self, cls, limit):
+        self.cls = cls
+        self.limit = limit
+        self.free = []
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self, *args):
+        """Returns an entity set up as if it had been built with cls(*args)."""
+        if self.free:
+            entity = self.free.pop()
+            entity.reset(*args)
+            self.hits += 1
+        else:
+            entity = self.cls(*args)
+            self.misses += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return entity
+
+    def release(self, entity):
+        """Returns an entity to the pool once nothing refers to it any more."""
+        self.in_use -= 1
+        if len(self.free) < self.limit:
+            self.free.append(entity)
+        else:
+            self.discarded += 1
+
+    def format(self):
+        """Returns the statistics as one printable line."""
+        return (f"{self.cls.__name__:<6} hits {self.hits:7d}  misses {self.misses:5d}  "
+                f"in use {self.in_use:5d}  high water {self.high_water:5d}  "
+                f"free {len(self.free):5d}  discarded {self.discarded:5d}")
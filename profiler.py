@@ -0,0 +1,164 @@
+"""
+Frame profiler: per-stage timings, entity counts and collision pair tests for
+recent frames, with an on-screen overlay and CSV export.
+"""
+
+import csv
+import time
+from collections import deque
+
+import pygame
+import config
+
+
+# Stages of Game.step, in the order they run
+STAGES = ("events", "audio", "sim", "draw", "overlay", "present", "capture", "wait")
+
+# Methods Game.update calls each simulation tick, timed inside "sim"
+UPDATE_STAGES = ("destroy_sounds", "run_force_field", "run_lasers", "run_freighter",
+                 "set_health_bar", "run_rocks", "run_crates", "run_explosions", "run_particles", "refill_rocks")
+
+# Update stages listed on the overlay (every stage goes into the CSV)
+OVERLAY_UPDATE_STAGES = ("run_lasers", "run_rocks", "run_crates", "run_explosions", "run_particles")
+
+# Counts recorded per frame
+COUNTS = ("ticks", "crates", "rocks", "lasers", "booms", "particles", "rock_pairs", "laser_pairs")
+
+COLUMNS = ("frame_ms", "input_latency") + STAGES + UPDATE_STAGES + COUNTS
+
+
+class FrameProfiler:
+    """
+    Records one row of timings and counts per frame while enabled.
+
+    Game.step calls begin_frame, lap after each stage and end_frame; Game
+    checks enabled first, so a disabled profiler costs one attribute read per
+    stage. Rows for the last config.PROFILER_HISTORY frames are kept for the
+    graph and for CSV export.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.enabled = False
+        self.visible = False
+        self.history = deque(maxlen=config.PROFILER_HISTORY)
+        self.current = dict.fromkeys(COLUMNS, 0)
+        self.frame_start = 0.0
+        self.last = 0.0
+        self.font = None
+        self.panel = None
+
+    def toggle(self):
+        """Shows or hides the overlay, recording only while it is shown."""
+        self.visible = not self.visible
+        self.enabled = self.visible
+
+    def begin_frame(self):
+        """Starts a new row."""
+        self.current = dict.fromkeys(COLUMNS, 0)
+        self.frame_start = self.last = time.perf_counter()
+
+    def lap(self, stage):
+        """Charges the time since the previous lap to a stage."""
+        now = time.perf_counter()
+        self.current[stage] += (now - self.last) * 1000
+        self.last = now
+
+    def run_update(self, game):
+        """Runs one simulation tick's update stages, timing each."""
+        row = self.current
+        for name in UPDATE_STAGES:
+            start = time.perf_counter()
+            getattr(game, name)()
+            row[name] += (time.perf_counter() - start) * 1000
+        row["ticks"] += 1
+        row["rock_pairs"] += game.rock_pair_tests
+        row["laser_pairs"] += game.laser_pair_tests
+
+    def end_frame(self):
+        """Finishes the row with the frame time and entity counts."""
+        game = self.game
+        row = self.current
+        row["frame_ms"] = (time.perf_counter() - self.frame_start) * 1000
+        row["input_latency"] = game.latency.last
+        row["crates"] = len(game.cratebox)
+        row["rocks"] = len(game.rockbox)
+        row["lasers"] = len(game.laserbox)
+        row["booms"] = len(game.boombox)
+        row["particles"] = game.particles.count if game.particles is not None else 0
+        self.history.append(tuple(row[column] for column in COLUMNS))
+
+    def averages(self, frames):
+        """Returns each column averaged over the last frames rows."""
+        rows = list(self.history)[-frames:]
+        if not rows:
+            return dict.fromkeys(COLUMNS, 0)
+        return {column: sum(row[i] for row in rows) / len(rows)
+                for i, column in enumerate(COLUMNS)}
+
+    def export_csv(self, path, frames=None):
+        """Writes the last frames rows (all kept rows by default) to a CSV file."""
+        rows = list(self.history)
+        if frames is not None:
+            rows = rows[-frames:]
+        with open(path, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(COLUMNS)
+            for row in rows:
+                writer.writerow(f"{value:.4f}" if isinstance(value, float) else value
+                                for value in row)
+        return len(rows)
+
+    def draw(self, surface):
+        """Draws the overlay in the top-left corner and returns its rect."""
+        loads = self.game.get_loads()
+        if self.font is None:
+            self.font = loads.game_font_small
+        average = self.averages(config.PROFILER_AVERAGE_FRAMES)
+        frame_ms = average["frame_ms"]
+        fps = 1000 / frame_ms if frame_ms > 0 else 0
+        # (label, value) rows; values are right-aligned in a column
+        lines = [(f"frame  {fps:.0f} fps", f"{frame_ms:.2f} ms"),
+                 ("input to present", f"{average['input_latency']:.2f}")]
+        for stage in STAGES:
+            lines.append((stage, f"{average[stage]:.3f}"))
+            if stage == "sim":
+                for name in OVERLAY_UPDATE_STAGES:
+                    lines.append(("    " + name, f"{average[name]:.3f}"))
+        for name in ("rocks", "lasers", "booms", "particles", "crates"):
+            lines.append((name, f"{average[name]:.0f}"))
+        lines.append(("rock pair tests", f"{average['rock_pairs']:.0f}"))
+        lines.append(("laser pair tests", f"{average['laser_pairs']:.0f}"))
+
+        # Through the text cache, so labels and unchanged values are not
+        # rendered again every frame the overlay measures
+        color = (230, 230, 230)
+        render = loads.text_cache.render
+        texts = [(render(self.font, label, color), render(self.font, value, color))
+                 for label, value in lines]
+        line_height = self.font.get_linesize()
+        graph_height = config.PROFILER_GRAPH_HEIGHT
+        label_width = max(label.get_width() for label, _ in texts)
+        value_width = max(value.get_width() for _, value in texts)
+        width = max(config.PROFILER_GRAPH_FRAMES, label_width + 20 + value_width) + 20
+        height = 10 + line_height * len(lines) + graph_height + 10
+        if self.panel is None or self.panel.get_size() != (width, height):
+            self.panel = pygame.Surface((width, height))
+            self.panel.set_alpha(200)
+        self.panel.fill((20, 20, 30))
+        for i, (label, value) in enumerate(texts):
+            y = 10 + i * line_height
+            self.panel.blit(label, (10, y))
+            self.panel.blit(value, (width - 10 - value.get_width(), y))
+
+        # Rolling frame-time graph, with a line at the target frame time
+        top = 10 + line_height * len(lines)
+        bottom = top + graph_height
+        scale = graph_height / (2000 / config.TARGET_FPS)
+        target_y = bottom - int(1000 / config.TARGET_FPS * scale)
+        pygame.draw.line(self.panel, (90, 90, 120), (10, target_y), (width - 10, target_y))
+        frames = list(self.history)[-config.PROFILER_GRAPH_FRAMES:]
+        points = [(10 + i, max(top, bottom - int(row[0] * scale))) for i, row in enumerate(frames)]
+        if len(points) > 1:
+            pygame.draw.lines(self.panel, (120, 230, 120), False, points)
+        return surface.blit(self.panel, (10, 10))
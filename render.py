@@ -0,0 +1,209 @@
+"""
+Rendering helpers: dirty-rectangle tracking for partial display updates,
+batched sprite drawing, frame snapshots and scaled presentation of an
+offscreen playfield.
+"""
+
+from collections import namedtuple
+
+import pygame
+
+
+# Everything needed to draw one frame, captured from the game after its
+# simulation ticks. Nothing in a snapshot is changed after capture, so it
+# can be drawn while the game simulates the next frame.
+#   layers      RenderQueue.take() result: per layer, surface -> positions
+#   particles   ParticleSystem.snapshot() result, or None
+#   hud         HudCompositor.state() result
+#   overlay     (surface, position) pairs drawn last, over everything
+#   input_time  perf_counter time the frame's input was sampled
+#   tick        simulation ticks run when the frame was captured
+FrameSnapshot = namedtuple("FrameSnapshot", "layers particles hud overlay input_time tick")
+
+
+class DirtyRects:
+    """
+    Tracks the rects drawn last frame and this frame, so only those regions
+    are cleared and pushed to the display.
+
+    Each frame the previous frame's rects are cleared, everything is drawn
+    again and the union of old and new rects is sent to display.update.
+    When the dirty area grows past max_fraction of the window, a full flip
+    is cheaper and is used instead.
+    """
+
+    def __init__(self, surface, max_fraction, color=(0, 0, 0)):
+        self.surface = surface
+        self.color = color
+        self.max_area = surface.get_width() * surface.get_height() * max_fraction
+        self.previous = []
+        self.current = []
+        self.full_redraw = True
+        self.full_flips = 0
+        self.partial_updates = 0
+
+    def invalidate(self):
+        """Forces the next frame to clear and flip the whole window."""
+        self.full_redraw = True
+
+    def clear(self):
+        """Clears what was drawn last frame, or the whole window if invalidated."""
+        if self.full_redraw:
+            self.surface.fill(self.color)
+        else:
+            for rect in self.previous:
+                self.surface.fill(self.color, rect)
+
+    def add(self, rect):
+        """Records a rect drawn this frame."""
+        self.current.append(rect)
+
+    def extend(self, rects):
+        """Records several rects drawn this frame."""
+        self.current.extend(rects)
+
+    def present(self):
+        """Pushes the dirty regions to the display, or flips if they are too large."""
+        rects = self.previous + self.current
+        area = sum(rect.width * rect.height for rect in rects)
+        if self.full_redraw or area > self.max_area:
+            pygame.display.flip()
+            self.full_flips += 1
+        else:
+            pygame.display.update(rects)
+            self.partial_updates += 1
+        self.finish()
+
+    def finish(self):
+        """Ends the frame without presenting, when something else presents it."""
+        self.previous = self.current
+        self.current = []
+        self.full_redraw = False
+
+
+class RenderQueue:
+    """
+    Collects the sprites of a frame and draws them in one call per layer.
+
+    Sprites are submitted as (surface, position) pairs into numbered layers,
+    which are drawn lowest first. Within a layer, pairs are grouped by
+    surface in the order each surface was first submitted that frame,
+    keeping submission order among copies of the same surface. Sprites
+    entirely outside the target are culled on submission.
+    """
+
+    def __init__(self, target, layers):
+        self.target = target
+        self.width, self.height = target.get_size()
+        self.layers = [{} for _ in range(layers)]
+        self.sizes = {}
+        self.fast = hasattr(target, "fblits")
+        self.drawn = 0
+        self.culled = 0
+        self.batches = 0
+
+    def submit(self, layer, surface, position):
+        """Queues surface to be drawn at position unless it is off the target."""
+        size = self.sizes.get(surface)
+        if size is None:
+            size = self.sizes[surface] = surface.get_size()
+        x, y = position
+        if x >= self.width or y >= self.height or x + size[0] <= 0 or y + size[1] <= 0:
+            self.culled += 1
+            return
+        positions = self.layers[layer].get(surface)
+        if positions is None:
+            self.layers[layer][surface] = [position]
+        else:
+            positions.append(position)
+
+    def submit_sprites(self, layer, sprites, alpha):
+        """
+        Queues the image of each sprite at its draw_position(alpha), culling
+        those off the target, in a single loop.
+        """
+        groups = self.layers[layer]
+        sizes = self.sizes
+        width, height = self.width, self.height
+        culled = 0
+        for sprite in sprites:
+            surface = sprite.image
+            position = sprite.draw_position(alpha)
+            size = sizes.get(surface)
+            if size is None:
+                size = sizes[surface] = surface.get_size()
+            x, y = position
+            if x >= width or y >= height or x + size[0] <= 0 or y + size[1] <= 0:
+                culled += 1
+                continue
+            positions = groups.get(surface)
+            if positions is None:
+                groups[surface] = [position]
+            else:
+                positions.append(position)
+        self.culled += culled
+
+    def extend(self, layer, pairs, culled=0):
+        """Queues pairs the caller has already culled, counting culled as skipped."""
+        groups = self.layers[layer]
+        for surface, position in pairs:
+            positions = groups.get(surface)
+            if positions is None:
+                groups[surface] = [position]
+            else:
+                positions.append(position)
+        self.culled += culled
+
+    def take(self):
+        """Returns the queued layers and starts a fresh, empty set."""
+        layers = self.layers
+        self.layers = [{} for _ in range(len(layers))]
+        return layers
+
+    def draw(self, layers, dirty_rects=None):
+        """Draws layers taken from the queue, adding the drawn rects to dirty_rects if given."""
+        target = self.target
+        for groups in layers:
+            if not groups:
+                continue
+            pairs = [(surface, position) for surface, positions in groups.items()
+                     for position in positions]
+            if dirty_rects is not None:
+                dirty_rects.extend(target.blits(pairs))
+            elif self.fast:
+                target.fblits(pairs)
+            else:
+                target.blits(pairs, doreturn=False)
+            self.drawn += len(pairs)
+            self.batches += 1
+
+    def flush(self, dirty_rects=None):
+        """Draws and empties every layer."""
+        self.draw(self.take(), dirty_rects)
+
+
+class ScaledPresenter:
+    """
+    Presents an offscreen playfield surface by smoothscaling it to the
+    largest size that fits the display with the same aspect ratio, centred
+    with black bars, then flipping.
+    """
+
+    def __init__(self, source, display):
+        self.source = source
+        self.display = display
+        source_width, source_height = source.get_size()
+        display_width, display_height = display.get_size()
+        scale = min(display_width / source_width, display_height / source_height)
+        self.dest = pygame.Rect(0, 0, round(source_width * scale), round(source_height * scale))
+        self.dest.center = display.get_rect().center
+        display.fill((0, 0, 0))
+        self.target = display.subsurface(self.dest)
+
+    def present(self):
+        """Scales the playfield onto the display and flips."""
+        if self.dest.size == self.source.get_size():
+            self.target.blit(self.source, (0, 0))
+        else:
+            pygame.transform.smoothscale(self.source, self.dest.size, self.target)
+        pygame.display.flip()
@@ -0,0 +1,142 @@
+"""
+Input recording and replay.
+
+A recording holds the game's RNG seed and window size, followed by every
+gameplay input in the order it was applied, each tagged with the number of
+simulation ticks run before it. Feeding the same inputs in at the same ticks
+to a game built with the same seed and window size reproduces the run
+exactly, however fast it is replayed.
+
+File layout (little-endian):
+    header  magic "FRIN", version u16, seed u64, tick rate u16,
+            window width u16, window height u16
+    entries varint tick delta since the previous entry, then one code byte
+    end     varint tick delta to the last tick run, then INPUT_END
+"""
+
+import struct
+
+
+MAGIC = b"FRIN"
+VERSION = 1
+HEADER = struct.Struct("<4sHQHHH")
+
+# Input codes. INPUT_HOLD is or'ed with the HOLD_* bits of the keys held down.
+INPUT_HOLD = 0x00
+HOLD_LEFT = 0x01
+HOLD_RIGHT = 0x02
+HOLD_UP = 0x04
+HOLD_DOWN = 0x08
+INPUT_SHOOT = 0x10
+INPUT_STOP_X = 0x11
+INPUT_STOP_Y = 0x12
+INPUT_CONTINUE = 0x13
+INPUT_END = 0x1F
+
+
+class RecordingHeader:
+    """Settings a recording must be replayed with."""
+
+    def __init__(self, seed, tick_rate, width, height):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.width = width
+        self.height = height
+
+
+def read_header(path):
+    """Reads just the header of a recording."""
+    with open(path, "rb") as source:
+        return _unpack_header(source.read(HEADER.size), path)
+
+
+def _unpack_header(data, path):
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not an input recording")
+    magic, version, seed, tick_rate, width, height = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an input recording")
+    if version != VERSION:
+        raise ValueError(f"{path} is recording version {version}, expected {VERSION}")
+    return RecordingHeader(seed, tick_rate, width, height)
+
+
+class InputRecorder:
+    """Appends a game's inputs to a recording file as they are applied."""
+
+    def __init__(self, path, header):
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, header.seed, header.tick_rate,
+                                    header.width, header.height))
+        self.last_tick = 0
+        self.count = 0
+
+    def _write(self, tick, code):
+        delta = tick - self.last_tick
+        self.last_tick = tick
+        out = bytearray()
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+        out.append(code)
+        self.file.write(out)
+
+    def record(self, tick, code):
+        """Records an input applied after tick simulation ticks."""
+        self._write(tick, code)
+        self.count += 1
+
+    def close(self, tick):
+        """Marks the end of the run at tick and closes the file."""
+        if self.file.closed:
+            return
+        self._write(tick, INPUT_END)
+        self.file.close()
+
+
+class InputReplay:
+    """Feeds a recording's inputs back to a game tick by tick."""
+
+    def __init__(self, path):
+        with open(path, "rb") as source:
+            data = source.read()
+        self.header = _unpack_header(data, path)
+        self.entries = []
+        self.end_tick = None
+        tick = 0
+        pos = HEADER.size
+        while pos < len(data):
+            delta = 0
+            shift = 0
+            while True:
+                byte = data[pos]
+                pos += 1
+                delta |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            tick += delta
+            code = data[pos]
+            pos += 1
+            if code == INPUT_END:
+                self.end_tick = tick
+                break
+            self.entries.append((tick, code))
+        if self.end_tick is None:
+            # Recording was cut short; play up to its last input
+            self.end_tick = tick
+        self.next = 0
+
+    def due(self, tick):
+        """Returns the codes recorded at tick, in order, and moves past them."""
+        codes = []
+        entries = self.entries
+        while self.next < len(entries) and entries[self.next][0] <= tick:
+            codes.append(entries[self.next][1])
+            self.next += 1
+        return codes
+
+    def finished(self, tick):
+        """Returns True once tick has reached the end of the recording."""
+        return tick >= self.end_tick
@@ -0,0 +1,11 @@
+"""
+Step/reset environments for training autopilot agents.
+
+FreighterEnv wraps one windowless Game; VectorEnv and ProcessVectorEnv step
+many of them in lockstep, in this process or in worker processes sharing
+memory. Run ``python -m rlenv`` from the game folder to measure steps per
+second; see ``python -m rlenv --help``.
+"""
+
+from rlenv.core import FreighterEnv, NUM_ACTIONS, FEATURE_SIZE
+from rlenv.vector import VectorEnv, ProcessVectorEnv
@@ -0,0 +1,65 @@
+"""
+Command-line entry point: python -m rlenv
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from rlenv import core
+from rlenv.vector import VectorEnv, ProcessVectorEnv
+
+
+def parse_args():
+    """Parses command-line options."""
+    parser = argparse.ArgumentParser(
+        prog="python -m rlenv",
+        description="Step batched environments with random actions and report steps per second")
+    parser.add_argument("--envs", type=int, default=8, help="games stepped in lockstep")
+    parser.add_argument("--obs", choices=("features", "pixels"), default="features",
+                        help="observation type")
+    parser.add_argument("--steps", type=int, default=500, help="batch steps to time")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes sharing memory (0: step every game in this process)")
+    parser.add_argument("--frame-skip", type=int, default=4, help="simulation ticks per step")
+    parser.add_argument("--size", default=None, metavar="WxH",
+                        help="playfield size (default: the configured logical resolution)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the games and the actions")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    size = tuple(int(n) for n in args.size.lower().split("x")) if args.size else None
+    options = dict(obs=args.obs, seed=args.seed, frame_skip=args.frame_skip, size=size)
+
+    started = time.perf_counter()
+    if args.workers:
+        envs = ProcessVectorEnv(args.envs, workers=args.workers, **options)
+    else:
+        envs = VectorEnv(args.envs, **options)
+    print(f"{args.envs} envs ({args.obs}, {args.workers or 'no'} workers) "
+          f"built in {time.perf_counter() - started:.1f}s", flush=True)
+
+    rng = np.random.default_rng(args.seed)
+    actions = rng.integers(0, core.NUM_ACTIONS, (args.steps, args.envs))
+    episodes = 0
+    with envs:
+        shape = envs.reset().shape
+        started = time.perf_counter()
+        for batch in actions:
+            infos = envs.step(batch)[-1]
+            episodes += len(infos)
+        elapsed = time.perf_counter() - started
+
+    steps = args.steps * args.envs
+    print(f"observations {args.obs} {tuple(shape)}")
+    print(f"{steps} steps in {elapsed:.2f}s: {steps / elapsed:,.0f} steps/s, "
+          f"{steps * args.frame_skip / elapsed:,.0f} ticks/s, {episodes} episodes ended")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
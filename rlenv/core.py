@@ -0,0 +1,260 @@
+"""
+Single-game step/reset environment.
+
+An episode is one level of a windowless Game. Each step applies one discrete
+action, runs frame_skip simulation ticks and returns the observation, the
+reward and whether the level ended. Observations are either the rendered
+frame or a fixed-size feature vector; both live in arrays the environment
+owns (or is handed) and are overwritten in place every step, so nothing is
+copied on the way out.
+"""
+
+import os
+
+# Environments never open a window or an audio device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import numpy as np
+import pygame
+import config
+import replay
+from funcs import SMALL, LARGE, DOWNRIGHT, UPRIGHT, DOWNLEFT
+from game import Game
+
+
+# Freighter movement for each action; action // len(MOVES) says whether to fire
+MOVES = (
+    0,
+    replay.HOLD_LEFT,
+    replay.HOLD_RIGHT,
+    replay.HOLD_UP,
+    replay.HOLD_DOWN,
+    replay.HOLD_UP | replay.HOLD_LEFT,
+    replay.HOLD_UP | replay.HOLD_RIGHT,
+    replay.HOLD_DOWN | replay.HOLD_LEFT,
+    replay.HOLD_DOWN | replay.HOLD_RIGHT,
+)
+NUM_ACTIONS = 2 * len(MOVES)
+
+# Feature vector layout: the freighter, then the nearest rocks, lasers and
+# crates to it, each slot zeroed when there are fewer than that many
+FREIGHTER_FEATURES = 5   # x, y, x velocity, y velocity, hp fraction
+ROCK_FEATURES = 6        # dx, dy, x heading, y heading, size, present
+LASER_FEATURES = 3       # dx, dy, present
+CRATE_FEATURES = 3       # dx, dy, present
+NEAREST_ROCKS = 16
+NEAREST_LASERS = 4
+NEAREST_CRATES = config.MAX_LEVEL
+FEATURE_SIZE = (FREIGHTER_FEATURES + NEAREST_ROCKS * ROCK_FEATURES +
+                NEAREST_LASERS * LASER_FEATURES + NEAREST_CRATES * CRATE_FEATURES)
+
+# Reward for each crate collected, rock destroyed, full health bar lost and
+# level won or lost
+REWARD_CRATE = 1.0
+REWARD_ROCK = 0.1
+REWARD_DAMAGE = -1.0
+REWARD_WIN = 5.0
+REWARD_LOSS = -5.0
+
+
+def playfield_size(size=None):
+    """Returns size, or the playfield size games are built with by default."""
+    return tuple(size or config.LOGICAL_RESOLUTION or (config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
+
+
+def frame_format():
+    """
+    Returns the pygame.image.frombuffer format matching the display's pixel
+    layout and the channel slice that turns its 4-byte pixels into RGB.
+    """
+    if not pygame.display.get_init():
+        pygame.display.init()
+    display = pygame.display.get_surface() or pygame.display.set_mode((1, 1))
+    if display.get_masks()[0] == 0xFF0000:
+        return "BGRA", slice(2, None, -1)
+    return "RGBA", slice(0, 3)
+
+
+class FreighterEnv:
+    """
+    One windowless game driven through reset and step.
+
+    obs is "features" for a FEATURE_SIZE float32 vector or "pixels" for the
+    rendered (height, width, 3) uint8 frame. Pixel observations are drawn
+    straight into frame, a (height, width, 4) uint8 array, through a surface
+    that wraps its memory; features are written into features. Either array
+    can be passed in so a vector of environments can share one batch buffer.
+    """
+
+    def __init__(self, obs="features", frame_skip=4, max_steps=5000, level=1,
+                 seed=None, size=None, frame=None, features=None):
+        if obs not in ("features", "pixels"):
+            raise ValueError(f"obs must be 'features' or 'pixels', not {obs!r}")
+        self.obs = obs
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.level = level
+        self.size = playfield_size(size)
+        width, height = self.size
+
+        fmt, channels = frame_format()
+        if obs == "pixels":
+            if frame is None:
+                frame = np.zeros((height, width, 4), dtype=np.uint8)
+            if frame.shape != (height, width, 4) or frame.dtype != np.uint8:
+                raise ValueError(f"frame must be a ({height}, {width}, 4) uint8 array")
+            self.frame = frame
+            self.pixels = frame[..., channels]
+            target = pygame.image.frombuffer(frame, self.size, fmt)
+        else:
+            self.frame = None
+            self.pixels = None
+            # Never drawn; it only gives the game its playfield size
+            target = pygame.Surface(self.size)
+        if features is None:
+            features = np.zeros(FEATURE_SIZE, dtype=np.float32)
+        self.features = features
+
+        self.game = Game(headless=True, seed=seed, surface=target)
+        self.steps = 0
+        self.episode_return = 0.0
+
+    @property
+    def observation_shape(self):
+        """Shape of the arrays returned by reset and step."""
+        if self.obs == "pixels":
+            return self.pixels.shape
+        return self.features.shape
+
+    def reset(self, seed=None):
+        """
+        Starts a new episode. Given a seed, the game and its particles are
+        reseeded and its clock rewound first, so every reset with that seed
+        plays out the same. Returns the first observation and an empty info
+        dict.
+        """
+        game = self.game
+        if seed is not None:
+            game.rng.seed(seed)
+            if game.particles is not None:
+                game.particles.seed(seed)
+            game.rewind_clock()
+        game.restart(self.level)
+        self.steps = 0
+        self.episode_return = 0.0
+        return self.observe(), {}
+
+    def step(self, action):
+        """
+        Applies action for frame_skip ticks. Returns (observation, reward,
+        terminated, truncated, info): terminated when the level is won or
+        lost, truncated after max_steps steps.
+        """
+        game = self.game
+        freighter = game.freighter
+        game.input(replay.INPUT_STOP_X)
+        game.input(replay.INPUT_STOP_Y)
+        move = MOVES[action % len(MOVES)]
+        if move:
+            game.input(replay.INPUT_HOLD | move)
+        if action >= len(MOVES):
+            game.input(replay.INPUT_SHOOT)
+
+        crates = game.crates_collected
+        rocks = game.rocks_destroyed
+        hp = freighter.hp
+        for _ in range(self.frame_skip):
+            game.tick()
+            if game.you_win or game.you_lose:
+                break
+        game.voices.flush()
+        self.steps += 1
+
+        reward = (REWARD_CRATE * (game.crates_collected - crates) +
+                  REWARD_ROCK * (game.rocks_destroyed - rocks) +
+                  REWARD_DAMAGE * max(0.0, hp - freighter.hp) / freighter.max_hp)
+        if game.you_win:
+            reward += REWARD_WIN
+        elif game.you_lose:
+            reward += REWARD_LOSS
+        self.episode_return += reward
+
+        terminated = game.you_win or game.you_lose
+        truncated = not terminated and self.steps >= self.max_steps
+        info = {}
+        if terminated or truncated:
+            info = {"won": game.you_win, "steps": self.steps, "return": self.episode_return}
+        return self.observe(), reward, terminated, truncated, info
+
+    def observe(self):
+        """Fills in and returns the current observation."""
+        if self.obs == "pixels":
+            self.game.draw()
+            return self.pixels
+        self._fill_features()
+        return self.features
+
+    def _fill_features(self):
+        """Writes the feature vector, positions relative to the freighter and scaled by the playfield."""
+        game = self.game
+        freighter = game.freighter
+        width, height = self.size
+        features = self.features
+        features[:] = 0
+        center_x, center_y = freighter.rect.center
+        features[:FREIGHTER_FEATURES] = (
+            center_x / width, center_y / height,
+            freighter.x_velocity / freighter.x_speed,
+            freighter.y_velocity / freighter.y_speed,
+            max(0.0, freighter.hp) / freighter.max_hp)
+        start = FREIGHTER_FEATURES
+
+        x, y, direction, size = self._rocks()
+        dx = (x - center_x) / width
+        dy = (y - center_y) / height
+        heading_x = np.where((direction == DOWNRIGHT) | (direction == UPRIGHT), 1.0, -1.0)
+        heading_y = np.where((direction == DOWNRIGHT) | (direction == DOWNLEFT), 1.0, -1.0)
+        scaled = (size - SMALL) / (LARGE - SMALL)
+        end = start + NEAREST_ROCKS * ROCK_FEATURES
+        _nearest(features[start:end].reshape(NEAREST_ROCKS, ROCK_FEATURES),
+                 dx, dy, heading_x, heading_y, scaled)
+        start = end
+
+        for store, count, columns in ((game.laserbox, NEAREST_LASERS, LASER_FEATURES),
+                                      (game.cratebox, NEAREST_CRATES, CRATE_FEATURES)):
+            centers = np.array([sprite.rect.center for sprite in store], dtype=np.float32).reshape(-1, 2)
+            end = start + count * columns
+            _nearest(features[start:end].reshape(count, columns),
+                     (centers[:, 0] - center_x) / width, (centers[:, 1] - center_y) / height)
+            start = end
+
+    def _rocks(self):
+        """Returns the centre x, centre y, direction and size of every rock as arrays."""
+        engine = self.game.rock_engine
+        if engine is not None:
+            slots = np.flatnonzero(engine.active)
+            return (engine.x[slots] + engine.w[slots] / 2, engine.y[slots] + engine.h[slots] / 2,
+                    engine.direction[slots], engine.size[slots])
+        rocks = np.array([(*rock.rect.center, rock.direction, rock.size)
+                          for rock in self.game.rockbox], dtype=np.float64).reshape(-1, 4)
+        return rocks[:, 0], rocks[:, 1], rocks[:, 2], rocks[:, 3]
+
+
+def _nearest(block, dx, dy, *extra):
+    """
+    Fills the rows of block with (dx, dy, *extra, 1) for the entities
+    nearest the freighter, closest first.
+    """
+    n = min(len(dx), len(block))
+    if not n:
+        return
+    distance = dx * dx + dy * dy
+    if n < len(dx):
+        index = np.argpartition(distance, n - 1)[:n]
+    else:
+        index = np.arange(n)
+    index = index[np.argsort(distance[index], kind="stable")]
+    for column, values in enumerate((dx, dy) + extra):
+        block[:n, column] = values[index]
+    block[:n, -1] = 1.0
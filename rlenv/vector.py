@@ -0,0 +1,236 @@
+"""
+Batched environments stepping many games in lockstep.
+
+Both wrappers keep the whole batch in a few preallocated arrays (observations,
+actions, rewards and end flags) that each game writes its own row of, so a
+step hands back views of the same arrays every time. VectorEnv runs every
+game in this process; ProcessVectorEnv splits them across worker processes
+and puts the arrays in shared memory so nothing is pickled but the per-step
+command and the infos of finished episodes.
+"""
+
+import gc
+import multiprocessing
+
+import numpy as np
+
+from rlenv.core import FreighterEnv, FEATURE_SIZE, frame_format, playfield_size
+
+
+def batch_layout(num_envs, obs, size):
+    """Returns the (name, shape, dtype) of every batch array, in buffer order."""
+    width, height = size
+    if obs == "pixels":
+        observations = ("frames", (num_envs, height, width, 4), np.uint8)
+    else:
+        observations = ("features", (num_envs, FEATURE_SIZE), np.float32)
+    return [observations,
+            ("actions", (num_envs,), np.int64),
+            ("rewards", (num_envs,), np.float32),
+            ("terminated", (num_envs,), np.bool_),
+            ("truncated", (num_envs,), np.bool_)]
+
+
+def batch_bytes(layout):
+    """Returns the buffer size batch_arrays needs for layout."""
+    return sum(_aligned(np.dtype(dtype).itemsize * int(np.prod(shape)))
+               for _, shape, dtype in layout)
+
+
+def batch_arrays(buffer, layout):
+    """Returns a dict of arrays laid out one after another over buffer."""
+    arrays = {}
+    offset = 0
+    for name, shape, dtype in layout:
+        count = int(np.prod(shape))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count, offset=offset).reshape(shape)
+        offset += _aligned(np.dtype(dtype).itemsize * count)
+    return arrays
+
+
+def _aligned(nbytes):
+    """Rounds nbytes up to a cache line so no two arrays share one."""
+    return (nbytes + 63) // 64 * 64
+
+
+class EnvSlice:
+    """
+    The games for rows lo to hi of a set of batch arrays, each writing its
+    observation, reward and end flags into its own row. Finished episodes
+    are reset straight away, so the row then holds the first observation of
+    the next one.
+    """
+
+    def __init__(self, arrays, lo, hi, obs, seed, kwargs):
+        self.arrays = arrays
+        self.lo = lo
+        self.envs = []
+        for i in range(lo, hi):
+            buffers = {"frame": arrays["frames"][i]} if obs == "pixels" else {"features": arrays["features"][i]}
+            self.envs.append(FreighterEnv(obs, seed=seed + i, **buffers, **kwargs))
+
+    def reset(self):
+        """Starts a new episode in every game."""
+        for env in self.envs:
+            env.reset()
+
+    def step(self):
+        """
+        Steps every game with its row of the actions array. Returns
+        (row, info) pairs for the episodes that ended.
+        """
+        arrays = self.arrays
+        actions = arrays["actions"]
+        rewards = arrays["rewards"]
+        terminated = arrays["terminated"]
+        truncated = arrays["truncated"]
+        finished = []
+        for i, env in enumerate(self.envs, self.lo):
+            _, rewards[i], terminated[i], truncated[i], info = env.step(int(actions[i]))
+            if terminated[i] or truncated[i]:
+                finished.append((i, info))
+                env.reset()
+        return finished
+
+    def close(self):
+        """Drops the games, releasing their hold on the batch arrays."""
+        self.envs = []
+        self.arrays = None
+        # Games reference themselves, so their surfaces only go on collection
+        gc.collect()
+
+
+class VectorEnv:
+    """
+    num_envs games stepped one after another in this process. Game i is
+    seeded with seed + i; other keyword arguments go to every FreighterEnv.
+    """
+
+    def __init__(self, num_envs, obs="features", seed=0, **kwargs):
+        self.num_envs = num_envs
+        self.obs = obs
+        layout = batch_layout(num_envs, obs, playfield_size(kwargs.get("size")))
+        self.arrays = batch_arrays(bytearray(batch_bytes(layout)), layout)
+        self.observations = _observations(self.arrays, obs)
+        self.slice = EnvSlice(self.arrays, 0, num_envs, obs, seed, kwargs)
+
+    def reset(self):
+        """Starts a new episode in every game. Returns the batch of observations."""
+        self.slice.reset()
+        return self.observations
+
+    def step(self, actions):
+        """
+        Steps every game with its entry of actions. Returns (observations,
+        rewards, terminated, truncated, infos); infos maps the index of each
+        game whose episode ended to that episode's info. The arrays are
+        reused by the next step.
+        """
+        self.arrays["actions"][:] = actions
+        finished = self.slice.step()
+        return self.observations, self.arrays["rewards"], self.arrays["terminated"], \
+            self.arrays["truncated"], dict(finished)
+
+    def close(self):
+        """Releases the games."""
+        self.slice.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ProcessVectorEnv(VectorEnv):
+    """
+    num_envs games split as evenly as possible across workers processes
+    (default: one per core), which step their share in parallel and write
+    straight into shared memory. The arrays step and reset return are views
+    of that memory, which stays mapped for as long as any of them is held.
+    """
+
+    def __init__(self, num_envs, workers=None, obs="features", seed=0, **kwargs):
+        self.num_envs = num_envs
+        self.obs = obs
+        workers = max(1, min(workers or multiprocessing.cpu_count(), num_envs))
+        size = playfield_size(kwargs.get("size"))
+        layout = batch_layout(num_envs, obs, size)
+        context = multiprocessing.get_context("spawn")
+        # Freed with the last array over it, so views the caller keeps stay valid
+        self.memory = context.RawArray("B", batch_bytes(layout))
+        self.arrays = batch_arrays(self.memory, layout)
+        self.observations = _observations(self.arrays, obs)
+
+        self.connections = []
+        self.processes = []
+        bounds = np.linspace(0, num_envs, workers + 1).astype(int)
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            parent, child = context.Pipe()
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(child, self.memory, layout, lo, hi, obs, seed, kwargs))
+            process.start()
+            child.close()
+            self.connections.append(parent)
+            self.processes.append(process)
+        for connection in self.connections:
+            connection.recv()
+
+    def reset(self):
+        """Starts a new episode in every game. Returns the batch of observations."""
+        self._command("reset")
+        return self.observations
+
+    def step(self, actions):
+        """Steps every game with its entry of actions; see VectorEnv.step."""
+        self.arrays["actions"][:] = actions
+        infos = {}
+        for finished in self._command("step"):
+            infos.update(finished)
+        return self.observations, self.arrays["rewards"], self.arrays["terminated"], \
+            self.arrays["truncated"], infos
+
+    def _command(self, command):
+        """Sends command to every worker and returns their replies once all have answered."""
+        for connection in self.connections:
+            connection.send(command)
+        return [connection.recv() for connection in self.connections]
+
+    def close(self):
+        """
+        Stops the workers and lets go of the shared memory, which is freed
+        once the arrays returned by step and reset are no longer held.
+        """
+        if self.memory is None:
+            return
+        for connection in self.connections:
+            connection.send("close")
+        for process in self.processes:
+            process.join()
+        self.arrays = self.observations = None
+        self.memory = None
+
+
+def _observations(arrays, obs):
+    """Returns the batch observation view: RGB frames or feature rows."""
+    if obs == "pixels":
+        return arrays["frames"][..., frame_format()[1]]
+    return arrays["features"]
+
+
+def _worker(connection, memory, layout, lo, hi, obs, seed, kwargs):
+    """Runs games lo to hi of a ProcessVectorEnv until told to close."""
+    envs = EnvSlice(batch_arrays(memory, layout), lo, hi, obs, seed, kwargs)
+    connection.send("ready")
+    try:
+        while True:
+            command = connection.recv()
+            if command == "step":
+                connection.send(envs.step())
+            elif command == "reset":
+                envs.reset()
+                connection.send(None)
+            else:
+                break
+    finally:
+        envs.close()
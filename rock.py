@@ -12,45 +12,53 @@ class Rock(SubSprite):
     Enemy rock that moves diagonally and bounces off walls and other rocks.
     """
     
+    __slots__ = ("move_speed",)
+    
     def __init__(self, game, size):
         super().__init__()
+        self.reset(game, size)
+    
+    def reset(self, game, size):
+        """Sets the rock up as a new one of the given size, so a pooled one can be reused."""
+        self.reset_sprite()
         self.set_game(game)
         
+        rng = game.rng
         self.size = size
-        self.direction = rand_int(DOWNLEFT, DOWNRIGHT)
+        self.direction = rand_int(DOWNLEFT, DOWNRIGHT, rng)
         
         # Set stats based on size
         if size == SMALL:
             self.hp = config.ROCK_SMALL_HP
             self.max_hp = config.ROCK_SMALL_HP
             self.atk = self.max_hp
-            self.move_speed = rand_int(config.ROCK_SMALL_MOVE_SPEED_MIN, config.ROCK_SMALL_MOVE_SPEED_MAX)
-            self.x_speed = rand_int(config.ROCK_SMALL_X_SPEED_MIN, config.ROCK_SMALL_X_SPEED_MAX)
-            self.y_speed = rand_int(config.ROCK_SMALL_Y_SPEED_MIN, config.ROCK_SMALL_Y_SPEED_MAX)
+            self.move_speed = rand_int(config.ROCK_SMALL_MOVE_SPEED_MIN, config.ROCK_SMALL_MOVE_SPEED_MAX, rng)
+            self.x_speed = rand_int(config.ROCK_SMALL_X_SPEED_MIN, config.ROCK_SMALL_X_SPEED_MAX, rng)
+            self.y_speed = rand_int(config.ROCK_SMALL_Y_SPEED_MIN, config.ROCK_SMALL_Y_SPEED_MAX, rng)
             self.image = game.get_loads().tex_sm_rock
         elif size == MEDIUM:
             self.hp = config.ROCK_MEDIUM_HP
             self.max_hp = config.ROCK_MEDIUM_HP
             self.atk = self.max_hp
-            self.move_speed = rand_int(config.ROCK_MEDIUM_MOVE_SPEED_MIN, config.ROCK_MEDIUM_MOVE_SPEED_MAX)
-            self.x_speed = rand_int(config.ROCK_MEDIUM_X_SPEED_MIN, config.ROCK_MEDIUM_X_SPEED_MAX)
-            self.y_speed = rand_int(config.ROCK_MEDIUM_Y_SPEED_MIN, config.ROCK_MEDIUM_Y_SPEED_MAX)
+            self.move_speed = rand_int(config.ROCK_MEDIUM_MOVE_SPEED_MIN, config.ROCK_MEDIUM_MOVE_SPEED_MAX, rng)
+            self.x_speed = rand_int(config.ROCK_MEDIUM_X_SPEED_MIN, config.ROCK_MEDIUM_X_SPEED_MAX, rng)
+            self.y_speed = rand_int(config.ROCK_MEDIUM_Y_SPEED_MIN, config.ROCK_MEDIUM_Y_SPEED_MAX, rng)
             self.image = game.get_loads().tex_md_rock
         elif size == LARGE:
             self.hp = config.ROCK_LARGE_HP
             self.max_hp = config.ROCK_LARGE_HP
             self.atk = self.max_hp
-            self.move_speed = rand_int(config.ROCK_LARGE_MOVE_SPEED_MIN, config.ROCK_LARGE_MOVE_SPEED_MAX)
+            self.move_speed = rand_int(config.ROCK_LARGE_MOVE_SPEED_MIN, config.ROCK_LARGE_MOVE_SPEED_MAX, rng)
             self.x_speed = config.ROCK_LARGE_X_SPEED
             self.y_speed = config.ROCK_LARGE_Y_SPEED
             self.image = game.get_loads().tex_lg_rock
         
-        self.rect = self.image.get_rect()
+        self.rect.size = self.image.get_size()
         
         # Set initial position (off-screen at top)
         window_width = game.window.get_width()
         self.set_position(
-            rand_int(0, window_width - self.rect.width),
+            rand_int(0, window_width - self.rect.width, rng),
             config.ROCK_SPAWN_OFFSET_Y - self.rect.height
         )
     
@@ -122,6 +130,7 @@ class Rock(SubSprite):
     
     def update(self):
         """Update rock state and position."""
+        self.begin_step()
         self.rock_blasted()
         if self.alive:
             self.move_me()
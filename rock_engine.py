@@ -0,0 +1,376 @@
+"""
+Optional NumPy-backed rock engine.
+
+Keeps the state of every rock in flat arrays so the whole field can be moved,
+bounced off the walls and bounced off the force field in a handful of array
+operations per frame. Each rock is still handed out as a RockView, which
+looks enough like a Rock for drawing and for the collision code in funcs.
+"""
+
+import pygame
+import config
+from funcs import SMALL, MEDIUM, LARGE, DOWNLEFT, DOWNRIGHT, UPLEFT, UPRIGHT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Texture slots, indexes into RockEngine.textures
+TEX_SMALL = 0
+TEX_MEDIUM = 1
+TEX_LARGE = 2
+TEX_LARGE_DAMAGED = 3
+
+
+def available():
+    """Returns True if NumPy is installed and the engine can be used."""
+    return np is not None
+
+
+class RockView:
+    """
+    Rock-compatible handle onto one slot of a RockEngine.
+
+    Reading rect returns a fresh pygame.Rect built from the arrays, so moving
+    a rock has to go through set_position rather than by editing the rect.
+    """
+
+    __slots__ = ("engine", "slot")
+
+    def __init__(self, engine, slot):
+        self.engine = engine
+        self.slot = slot
+
+    @property
+    def rect(self):
+        e, i = self.engine, self.slot
+        return pygame.Rect(int(e.x[i]), int(e.y[i]), int(e.w[i]), int(e.h[i]))
+
+    @property
+    def image(self):
+        return self.engine.textures[self.engine.tex[self.slot]]
+
+    @property
+    def size(self):
+        return int(self.engine.size[self.slot])
+
+    @property
+    def atk(self):
+        return float(self.engine.max_hp[self.slot])
+
+    @property
+    def max_hp(self):
+        return float(self.engine.max_hp[self.slot])
+
+    @property
+    def hp(self):
+        return float(self.engine.hp[self.slot])
+
+    @hp.setter
+    def hp(self, value):
+        self.engine.hp[self.slot] = value
+
+    @property
+    def alive(self):
+        return bool(self.engine.alive[self.slot])
+
+    @alive.setter
+    def alive(self, value):
+        self.engine.alive[self.slot] = value
+
+    @property
+    def direction(self):
+        return int(self.engine.direction[self.slot])
+
+    @direction.setter
+    def direction(self, value):
+        self.engine.direction[self.slot] = value
+
+    def get_position(self):
+        """Returns the rock's position as a tuple (x, y)."""
+        return (int(self.engine.x[self.slot]), int(self.engine.y[self.slot]))
+
+    def set_position(self, x, y):
+        """Sets the rock's position without interpolating from the old one."""
+        self.engine.x[self.slot] = self.engine.prev_x[self.slot] = x
+        self.engine.y[self.slot] = self.engine.prev_y[self.slot] = y
+
+    def update(self):
+        """Rocks are advanced in bulk by RockEngine.step, so this does nothing."""
+
+
+class RockEngine:
+    """
+    Structure-of-arrays store for every rock in play.
+
+    Slots are reused through a free list so a RockView stays valid until its
+    rock is released. Arrays double in size when they run out of slots.
+    """
+
+    def __init__(self, game, capacity=256):
+        self.game = game
+        loads = game.get_loads()
+        self.textures = [loads.tex_sm_rock, loads.tex_md_rock,
+                         loads.tex_lg_rock, loads.tex_lg_rock2]
+        self.max_size = max(max(tex.get_size()) for tex in self.textures)
+        self.capacity = 0
+        self.active = np.zeros(0, dtype=bool)
+        self.free = []
+        self.views = []
+        self._grow(capacity)
+
+    def _grow(self, capacity):
+        """Resizes every array to hold at least capacity rocks."""
+        old = self.capacity
+
+        def resized(name, dtype):
+            array = np.zeros(capacity, dtype=dtype)
+            if old:
+                array[:old] = getattr(self, name)
+            setattr(self, name, array)
+
+        resized("x", np.int64)
+        resized("y", np.int64)
+        resized("prev_x", np.int64)
+        resized("prev_y", np.int64)
+        resized("w", np.int64)
+        resized("h", np.int64)
+        resized("x_speed", np.int64)
+        resized("y_speed", np.int64)
+        resized("direction", np.int8)
+        resized("move_interval", np.int64)
+        resized("last_move_time", np.int64)
+        resized("hp", np.float64)
+        resized("max_hp", np.float64)
+        resized("size", np.int8)
+        resized("tex", np.int8)
+        resized("alive", bool)
+        resized("active", bool)
+
+        self.views.extend(RockView(self, slot) for slot in range(old, capacity))
+        self.free.extend(range(capacity - 1, old - 1, -1))
+        self.capacity = capacity
+
+    def adopt(self, rock):
+        """Copies a freshly built Rock into a free slot and returns its view."""
+        if not self.free:
+            self._grow(self.capacity * 2)
+        i = self.free.pop()
+        self.x[i] = self.prev_x[i] = rock.rect.x
+        self.y[i] = self.prev_y[i] = rock.rect.y
+        self.w[i] = rock.rect.width
+        self.h[i] = rock.rect.height
+        self.x_speed[i] = rock.x_speed
+        self.y_speed[i] = rock.y_speed
+        self.direction[i] = rock.direction
+        if rock.move_speed > 0:
+            self.move_interval[i] = config.ROCK_MOVE_BASE // rock.move_speed
+        else:
+            self.move_interval[i] = config.ROCK_MOVE_BASE
+        self.last_move_time[i] = rock.last_move_time
+        self.hp[i] = rock.hp
+        self.max_hp[i] = rock.max_hp
+        self.size[i] = rock.size
+        if rock.size == SMALL:
+            self.tex[i] = TEX_SMALL
+        elif rock.size == MEDIUM:
+            self.tex[i] = TEX_MEDIUM
+        else:
+            self.tex[i] = TEX_LARGE
+        self.alive[i] = rock.alive
+        self.active[i] = True
+        return self.views[i]
+
+    def release(self, view):
+        """Frees the slot behind a view."""
+        self.active[view.slot] = False
+        self.free.append(view.slot)
+
+    def clear(self):
+        """Frees every slot."""
+        self.active[:] = False
+        self.free = list(range(self.capacity - 1, -1, -1))
+
+    def step(self, time):
+        """
+        Advances every active rock by one frame.
+
+        Mirrors Rock.update: damage check, move when the move interval has
+        passed, then the left, right, top and force-field bounce checks.
+        """
+        active = self.active
+        hp = self.hp
+        self.prev_x[:] = self.x
+        self.prev_y[:] = self.y
+
+        # Rock.rock_blasted
+        self.alive[active & (hp <= 0)] = False
+        damaged = active & self.alive & (hp < self.max_hp) & (self.size == LARGE)
+        self.tex[damaged] = TEX_LARGE_DAMAGED
+
+        moving = active & self.alive
+        direction = self.direction
+        going_left = (direction == DOWNLEFT) | (direction == UPLEFT)
+        going_down = (direction == DOWNLEFT) | (direction == DOWNRIGHT)
+        due = moving & (time - self.last_move_time >= self.move_interval)
+        self.x += np.where(going_left, -self.x_speed, self.x_speed) * due
+        self.y += np.where(going_down, self.y_speed, -self.y_speed) * due
+        self.last_move_time[due] = time
+
+        x, y = self.x, self.y
+        window_width = self.game.window.get_width()
+        window_height = self.game.window.get_height()
+        freighter_height = self.game.get_freighter().rect.height
+
+        # Left wall
+        self._turn(moving & (x <= 0), DOWNLEFT, DOWNRIGHT, UPLEFT, UPRIGHT)
+        # Right wall
+        self._turn(moving & (x >= window_width - self.w), DOWNRIGHT, DOWNLEFT, UPRIGHT, UPLEFT)
+        # Top wall
+        self._turn(moving & (y <= 0), UPRIGHT, DOWNRIGHT, UPLEFT, DOWNLEFT)
+        # Force field
+        bottom_boundary = window_height - (self.h + freighter_height + config.FORCE_FIELD_OFFSET)
+        at_field = moving & (y >= bottom_boundary)
+        self._turn(at_field, DOWNRIGHT, UPRIGHT, DOWNLEFT, UPLEFT)
+        if at_field.any():
+            self.game.ff_set_true()
+
+    def _turn(self, mask, from1, to1, from2, to2):
+        """Swaps from1 to to1 and from2 to to2 for the rocks in mask."""
+        direction = self.direction
+        first = mask & (direction == from1)
+        second = mask & (direction == from2)
+        direction[first] = to1
+        direction[second] = to2
+
+    def bounce(self):
+        """
+        Applies funcs.bounce_rocks to every overlapping pair of live rocks.
+
+        Candidate pairs come from sorting rocks by row band and then by x,
+        so only rocks in the same or the next band and less than one rock
+        size apart are rect-tested. bounce_rocks sets a rock's vertical and
+        horizontal headings independently, so after a run of contacts each
+        heading is whatever the last contact to touch it set; that contact
+        is found for every rock at once, taking contacts in slot order of
+        the other rock. Unlike the per-object path, every rock has already
+        moved this step and contacts are not taken in rockbox order, so the
+        two can differ where three or more rocks touch. Returns the number
+        of rect tests made.
+        """
+        slots = np.flatnonzero(self.active)
+        if len(slots) < 2:
+            return 0
+        reach = self.max_size
+        xs = self.x[slots]
+        xs = xs - xs.min()
+        row_stride = int(xs.max()) + 2 * reach + 1
+        keys = (self.y[slots] // reach) * row_stride + xs
+        by_key = np.argsort(keys, kind="stable")
+        order, keys = slots[by_key], keys[by_key]
+        index = np.arange(len(order))
+
+        # Same band, to the right; next band, either side
+        a1, b1 = self._span(order, index + 1,
+                            np.searchsorted(keys, keys + reach, side="left"))
+        a2, b2 = self._span(order,
+                            np.searchsorted(keys, keys + row_stride - reach + 1, side="left"),
+                            np.searchsorted(keys, keys + row_stride + reach, side="left"))
+        a = np.concatenate((a1, a2))
+        b = np.concatenate((b1, b2))
+        total = len(a)
+        if total == 0:
+            return 0
+
+        # Edges gathered once in 32 bits, then kept for the pairs that hit
+        left = self.x.astype(np.int32)
+        top = self.y.astype(np.int32)
+        right = left + self.w.astype(np.int32)
+        bottom = top + self.h.astype(np.int32)
+        left_a, left_b, right_a, right_b = left[a], left[b], right[a], right[b]
+        top_a, top_b, bottom_a, bottom_b = top[a], top[b], bottom[a], bottom[b]
+        hit = np.flatnonzero((left_a < right_b) & (left_b < right_a) &
+                             (top_a < bottom_b) & (top_b < bottom_a))
+        if len(hit) == 0:
+            return total
+        a, b = a[hit], b[hit]
+        left_a, left_b, right_a, right_b = left_a[hit], left_b[hit], right_a[hit], right_b[hit]
+        top_a, top_b, bottom_a, bottom_b = top_a[hit], top_b[hit], bottom_a[hit], bottom_b[hit]
+
+        # Each overlap bounces both rocks: r1 is the rock struck, r2 the other
+        r1 = np.concatenate((a, b))
+        r2 = np.concatenate((b, a))
+        top1, top2 = np.concatenate((top_a, top_b)), np.concatenate((top_b, top_a))
+        bottom1, bottom2 = np.concatenate((bottom_a, bottom_b)), np.concatenate((bottom_b, bottom_a))
+        left1, left2 = np.concatenate((left_a, left_b)), np.concatenate((left_b, left_a))
+        right1, right2 = np.concatenate((right_a, right_b)), np.concatenate((right_b, right_a))
+        size = self.size
+        smaller = size[r1] <= size[r2]
+        from_top = smaller & (top1 <= bottom2) & (bottom1 >= bottom2)
+        from_bottom = smaller & (bottom1 >= top2) & (top1 <= top2)
+        from_right = smaller & (right1 >= left2) & (left1 <= left2)
+        from_left = smaller & (left1 <= right2) & (right1 >= right2)
+
+        direction = self.direction
+        going_left = (direction == DOWNLEFT) | (direction == UPLEFT)
+        going_down = (direction == DOWNLEFT) | (direction == DOWNRIGHT)
+        last = self._last_contact(r1, r2, from_top | from_bottom)
+        going_down[r1[last]] = ~from_bottom[last]
+        last = self._last_contact(r1, r2, from_left | from_right)
+        going_left[r1[last]] = ~from_left[last]
+        active = self.active
+        direction[active] = np.where(
+            going_down[active],
+            np.where(going_left[active], DOWNLEFT, DOWNRIGHT),
+            np.where(going_left[active], UPLEFT, UPRIGHT))
+        return total
+
+    def _last_contact(self, r1, r2, mask):
+        """
+        Returns a mask of the contacts (r1 struck by r2) that are, among
+        those in mask, the one with the highest r2 slot for their r1.
+        """
+        highest = np.full(self.capacity, -1, dtype=r2.dtype)
+        np.maximum.at(highest, r1[mask], r2[mask])
+        return mask & (r2 == highest[r1])
+
+    @staticmethod
+    def _span(order, lo, hi):
+        """Expands per-rock index ranges [lo, hi) of order into pair arrays."""
+        counts = np.maximum(hi - lo, 0)
+        total = int(counts.sum())
+        first = np.repeat(np.arange(len(order)), counts)
+        offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+        return order[first], order[lo[first] + offsets]
+
+    def overlapping(self, rect):
+        """Returns the views of active rocks whose rects overlap rect."""
+        x, y, w, h = self.x, self.y, self.w, self.h
+        hit = (self.active &
+               (x < rect.right) & (rect.x < x + w) &
+               (y < rect.bottom) & (rect.y < y + h))
+        return [self.views[i] for i in np.flatnonzero(hit)]
+
+    def dead(self):
+        """Returns the views of active rocks that are no longer alive."""
+        return [self.views[i] for i in np.flatnonzero(self.active & ~self.alive)]
+
+    def sprites(self, alpha, width, height):
+        """
+        Returns (texture, position) pairs for every active rock that is at
+        least partly inside a width by height target, drawn alpha of the way
+        between its position before and after the last step, and the number
+        of rocks culled for lying wholly outside it.
+        """
+        slots = np.flatnonzero(self.active)
+        prev_x, prev_y = self.prev_x[slots], self.prev_y[slots]
+        xs = np.rint(prev_x + (self.x[slots] - prev_x) * alpha).astype(np.int64)
+        ys = np.rint(prev_y + (self.y[slots] - prev_y) * alpha).astype(np.int64)
+        visible = ((xs < width) & (ys < height) &
+                   (xs + self.w[slots] > 0) & (ys + self.h[slots] > 0))
+        textures = self.textures
+        pairs = [(textures[t], (px, py)) for t, px, py in
+                 zip(self.tex[slots][visible].tolist(), xs[visible].tolist(), ys[visible].tolist())]
+        return pairs, len(slots) - len(pairs)
@@ -0,0 +1,138 @@
+"""
+Broad-phase structures for collision checks: a uniform-grid spatial hash for
+rock-to-rock bouncing and a y-sorted sweep for laser-to-rock hits.
+"""
+
+from bisect import bisect_left
+from funcs import bounce_rocks
+
+
+class SpatialHash:
+    """
+    Buckets rocks by the grid cell containing their top-left corner.
+
+    The cell size is at least as large as the biggest rock, so two rocks can
+    only overlap if their cells are neighbours. Cells are kept up to date as
+    rocks move during the frame, so a query always sees current positions.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = max(1, int(cell_size))
+        self.cells = {}
+        self.cell_of = {}
+        self.order = {}
+        self.pair_tests = 0
+
+    def _cell(self, rect):
+        """Returns the grid cell key for a rect."""
+        return (rect.x // self.cell_size, rect.y // self.cell_size)
+
+    def rebuild(self, rocks):
+        """Clears the grid and inserts every rock, remembering list order."""
+        self.cells.clear()
+        self.cell_of.clear()
+        self.order.clear()
+        self.pair_tests = 0
+        for index, rock in enumerate(rocks):
+            self.order[rock] = index
+            self._insert(rock, self._cell(rock.rect))
+
+    def _insert(self, rock, cell):
+        bucket = self.cells.get(cell)
+        if bucket is None:
+            self.cells[cell] = [rock]
+        else:
+            bucket.append(rock)
+        self.cell_of[rock] = cell
+
+    def move(self, rock):
+        """Moves a rock to a new cell if its position changed cells."""
+        old_cell = self.cell_of.get(rock)
+        new_cell = self._cell(rock.rect)
+        if old_cell == new_cell:
+            return
+        if old_cell is not None:
+            self.cells[old_cell].remove(rock)
+        self._insert(rock, new_cell)
+
+    def remove(self, rock):
+        """Removes a rock from the grid."""
+        cell = self.cell_of.pop(rock, None)
+        if cell is not None:
+            self.cells[cell].remove(rock)
+        self.order.pop(rock, None)
+
+    def neighbours(self, rock):
+        """
+        Returns the other rocks in the 3x3 block of cells around a rock,
+        sorted into the same order they have in the rock list.
+        """
+        cx, cy = self.cell_of[rock]
+        found = []
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                bucket = self.cells.get((gx, gy))
+                if bucket:
+                    found.extend(bucket)
+        found.remove(rock)
+        found.sort(key=self.order.__getitem__)
+        return found
+
+    def bounce(self, rock):
+        """Runs bounce_rocks for a rock against each of its neighbours."""
+        for other in self.neighbours(rock):
+            self.pair_tests += 1
+            bounce_rocks(rock, other)
+
+
+class RockSweep:
+    """
+    Rocks sorted by the top edge of their rect, for interval queries along y.
+
+    A query rect only needs to look at rocks whose top lies between its own
+    top minus the tallest rock height and its bottom, which a pair of binary
+    searches finds in O(log R).
+    """
+
+    def __init__(self):
+        self.tops = []
+        self.rects = []
+        self.rocks = []
+        self.max_height = 0
+        self.pair_tests = 0
+
+    def rebuild(self, rocks):
+        """Snapshots and sorts the rects of every rock."""
+        entries = sorted(((rock.rect, index, rock) for index, rock in enumerate(rocks)),
+                         key=lambda entry: (entry[0].y, entry[1]))
+        self.tops = [rect.y for rect, _, _ in entries]
+        self.rects = [rect for rect, _, _ in entries]
+        self.rocks = [rock for _, _, rock in entries]
+        self.max_height = max((rect.height for rect in self.rects), default=0)
+        self.pair_tests = 0
+
+    def first_hit(self, swept, swept_mask=None, masks=None):
+        """
+        Returns the rock an upward-moving projectile covering swept meets
+        first, which is the overlapping rock with the lowest bottom edge.
+        Returns None on a miss.
+
+        If swept_mask is given, a rock whose rect overlaps only counts when
+        its mask, looked up in masks by image, overlaps swept_mask too.
+        """
+        lo = bisect_left(self.tops, swept.top - self.max_height + 1)
+        hi = bisect_left(self.tops, swept.bottom)
+        best = None
+        best_bottom = None
+        for k in range(lo, hi):
+            rect = self.rects[k]
+            self.pair_tests += 1
+            if swept.colliderect(rect) and (best is None or rect.bottom > best_bottom):
+                rock = self.rocks[k]
+                if swept_mask is not None:
+                    offset = (swept.x - rect.x, swept.y - rect.y)
+                    if masks[rock.image].overlap(swept_mask, offset) is None:
+                        continue
+                best = rock
+                best_bottom = rect.bottom
+        return best
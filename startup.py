@@ -0,0 +1,64 @@
+"""
+Startup timing: how long each phase takes up to the first presented frame.
+"""
+
+import threading
+import time
+
+
+class StartupTimer:
+    """
+    Records the duration of each startup phase on the main thread, plus work
+    finished on background threads, measured from when the timer was made.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+        self.background = []
+        self.first_frame_ms = None
+        self.print_report = False
+        self.lock = threading.Lock()
+
+    def elapsed_ms(self, now=None):
+        """Returns milliseconds since the timer was made."""
+        if now is None:
+            now = time.perf_counter()
+        return (now - self.start) * 1000
+
+    def mark(self, phase):
+        """Ends a main-thread phase that began at the previous mark."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000))
+        self.last = now
+
+    def mark_background(self, phase, began):
+        """Records a background phase that began at the perf_counter time began."""
+        now = time.perf_counter()
+        with self.lock:
+            self.background.append((phase, (now - began) * 1000, self.elapsed_ms(now)))
+
+    def first_frame(self):
+        """Marks the first presented frame, printing the report if asked to."""
+        if self.first_frame_ms is not None:
+            return
+        self.mark("first frame")
+        self.first_frame_ms = self.elapsed_ms(self.last)
+        if self.print_report:
+            print(self.format())
+
+    def format(self):
+        """Returns the report as printable text."""
+        lines = ["startup phase            ms"]
+        for phase, ms in self.phases:
+            lines.append(f"  {phase:<20} {ms:8.1f}")
+        if self.first_frame_ms is not None:
+            lines.append(f"time to first frame    {self.first_frame_ms:8.1f}")
+        with self.lock:
+            background = list(self.background)
+        if background:
+            lines.append("background phase         ms   done at")
+            for phase, ms, done_at in background:
+                lines.append(f"  {phase:<20} {ms:8.1f}  {done_at:8.1f}")
+        return "\n".join(lines)
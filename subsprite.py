@@ -11,7 +11,18 @@ class SubSprite:
     Contains common properties and methods for movement, collision, and state.
     """
     
+    __slots__ = (
+        "last_move_time", "x_speed", "y_speed", "x_velocity", "y_velocity",
+        "alive", "struck", "pos_x", "pos_y", "prev_x", "prev_y",
+        "size", "direction", "atk", "hp", "max_hp", "image", "rect", "game",
+    )
+    
     def __init__(self):
+        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.reset_sprite()
+    
+    def reset_sprite(self):
+        """Puts the common state back to its defaults, keeping the same rect."""
         self.last_move_time = 0
         self.x_speed = 1
         self.y_speed = 1
@@ -20,6 +31,12 @@ class SubSprite:
         self.alive = True
         self.struck = False
         
+        # Sub-pixel position, and where the last simulation step started
+        self.pos_x = 0.0
+        self.pos_y = 0.0
+        self.prev_x = 0.0
+        self.prev_y = 0.0
+        
         # Game entity properties
         self.size = 0
         self.direction = 0
@@ -29,7 +46,7 @@ class SubSprite:
         
         # Pygame sprite properties
         self.image = None
-        self.rect = pygame.Rect(0, 0, 0, 0)
+        self.rect.update(0, 0, 0, 0)
         self.game = None
     
     def set_game(self, game):
@@ -39,21 +56,28 @@ class SubSprite:
     def set_rect(self):
         """Updates the collision rectangle to match the sprite's position and size."""
         if self.image:
-            self.rect = pygame.Rect(
-                self.rect.x,
-                self.rect.y,
-                self.image.get_width(),
-                self.image.get_height()
-            )
+            self.rect.size = self.image.get_size()
     
     def get_position(self):
         """Returns the sprite's position as a tuple (x, y)."""
         return (self.rect.x, self.rect.y)
     
     def set_position(self, x, y):
-        """Sets the sprite's position."""
-        self.rect.x = x
-        self.rect.y = y
+        """Sets the sprite's position without interpolating from the old one."""
+        self.pos_x = self.prev_x = x
+        self.pos_y = self.prev_y = y
+        self.rect.x = round(x)
+        self.rect.y = round(y)
+    
+    def begin_step(self):
+        """Remembers the current position as the start of a simulation step."""
+        self.prev_x = self.pos_x
+        self.prev_y = self.pos_y
+    
+    def draw_position(self, alpha):
+        """Returns the position to draw at, alpha of the way through the last step."""
+        return (round(self.prev_x + (self.pos_x - self.prev_x) * alpha),
+                round(self.prev_y + (self.pos_y - self.prev_y) * alpha))
     
     def get_size(self):
         """Returns the sprite's size as a tuple (width, height)."""
@@ -63,14 +87,18 @@ class SubSprite:
     
     def move(self, dx, dy):
         """Moves the sprite by the given delta."""
-        self.rect.x += dx
-        self.rect.y += dy
+        self.pos_x += dx
+        self.pos_y += dy
+        self.rect.x = round(self.pos_x)
+        self.rect.y = round(self.pos_y)
     
     def set_x(self, x):
         """Sets the x position."""
-        self.rect.x = x
+        self.pos_x = x
+        self.rect.x = round(x)
     
     def set_y(self, y):
         """Sets the y position."""
-        self.rect.y = y
+        self.pos_y = y
+        self.rect.y = round(y)
 
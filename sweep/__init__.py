@@ -0,0 +1,7 @@
+"""
+Parameter sweeps for difficulty balancing.
+
+Runs many windowless games in parallel with different config overrides and
+collects per-level results into one table. Run with ``python -m sweep`` from
+the game folder; see ``python -m sweep --help``.
+"""
@@ -0,0 +1,81 @@
+"""
+Command-line entry point: python -m sweep
+"""
+
+import argparse
+import csv
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import config
+from sweep import runner
+
+
+def parse_args():
+    """Parses command-line options."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sweep",
+        description="Run windowless games over config overrides and tabulate the results")
+    parser.add_argument("--set", dest="grid", action="append", default=[], metavar="NAME=V1,V2",
+                        help="config setting and values to sweep (repeat for a grid)")
+    parser.add_argument("--range", dest="ranges", action="append", default=[], metavar="NAME=LO:HI",
+                        help="config setting to sample uniformly (needs --samples)")
+    parser.add_argument("--samples", type=int, default=0,
+                        help="draw this many random points instead of the full grid")
+    parser.add_argument("--repeats", type=int, default=1,
+                        help="runs per point, each with its own seed")
+    parser.add_argument("--seed", type=int, default=0, help="seed for run seeds and sampling")
+    parser.add_argument("--pilot", default="auto",
+                        help="auto, idle, or module:function called before every tick")
+    parser.add_argument("--max-level", type=int, default=config.MAX_LEVEL,
+                        help="stop a run after clearing this level")
+    parser.add_argument("--level-seconds", type=float, default=180.0,
+                        help="game seconds before a level counts as a timeout")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    parser.add_argument("--out", default="sweep.csv", help="where to write the per-level table")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    grid = runner.parse_grid(args.grid)
+    ranges = runner.parse_ranges(args.ranges)
+    if ranges and not args.samples:
+        print("--range needs --samples", file=sys.stderr)
+        return 2
+    if args.samples:
+        points = runner.sample_points(grid, ranges, args.samples, random.Random(args.seed))
+    else:
+        points = runner.grid_points(grid)
+    names = list(grid) + [name for name in ranges if name not in grid]
+    tasks = runner.build_tasks(points, args.repeats, args.seed, args.pilot,
+                               args.max_level, args.level_seconds)
+
+    print(f"{len(tasks)} runs on {args.workers} workers", flush=True)
+    started = time.perf_counter()
+    table = []
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=runner.init_worker) as pool:
+        futures = [pool.submit(runner.run_task, task) for task in tasks]
+        for done, future in enumerate(as_completed(futures), 1):
+            task, rows = future.result()
+            for row in rows:
+                table.append(dict({name: task["overrides"].get(name) for name in names}, **row))
+            if done % max(1, len(tasks) // 20) == 0 or done == len(tasks):
+                print(f"  {done}/{len(tasks)} runs, {time.perf_counter() - started:.1f}s", flush=True)
+    table.sort(key=lambda row: (row["run"], row["level"]))
+
+    with open(args.out, "w", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=names + list(runner.RESULT_COLUMNS))
+        writer.writeheader()
+        writer.writerows(table)
+    print(runner.format_table(runner.summarize(table, names)))
+    print(f"saved {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
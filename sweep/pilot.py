@@ -0,0 +1,95 @@
+"""
+Pilots that play a windowless game by issuing input codes each tick.
+
+A pilot is a callable pilot(game) run before every simulation tick; it
+steers through game.input like the keyboard does.
+"""
+
+import importlib
+
+import replay
+
+
+# How close (pixels) a rock may get before the auto pilot backs away
+AVOID_MARGIN = 40
+
+
+def idle_pilot(game):
+    """Never touches the controls."""
+
+
+def auto_pilot(game):
+    """
+    Fires whenever a rock is overhead, backs away from rocks that come
+    within AVOID_MARGIN pixels and otherwise flies toward the nearest crate.
+    Between levels it continues as soon as the win cascade has finished.
+    """
+    freighter = game.freighter
+    if game.you_win and not game.rockbox:
+        game.input(replay.INPUT_CONTINUE)
+        return
+    if not freighter.alive or not game.engageable:
+        return
+
+    ship = freighter.rect
+    danger = ship.inflate(2 * AVOID_MARGIN, 2 * AVOID_MARGIN)
+    shoot = False
+    away_x = away_y = 0
+    for rock in game.rockbox:
+        rect = rock.rect
+        if not shoot and rect.bottom <= ship.top and rect.left < ship.right and rect.right > ship.left:
+            shoot = True
+        if rect.colliderect(danger):
+            away_x += ship.centerx - rect.centerx
+            away_y += ship.centery - rect.centery
+    if shoot:
+        game.input(replay.INPUT_SHOOT)
+
+    if away_x or away_y:
+        dx, dy = away_x, away_y
+    else:
+        target = None
+        best = None
+        for crate in game.cratebox:
+            cx = crate.rect.centerx - ship.centerx
+            cy = crate.rect.centery - ship.centery
+            distance = cx * cx + cy * cy
+            if best is None or distance < best:
+                best = distance
+                target = crate.rect
+        if target is None:
+            return
+        dx = target.centerx - ship.centerx
+        dy = target.centery - ship.centery
+
+    held = 0
+    if dx < -freighter.x_speed:
+        held |= replay.HOLD_LEFT
+    elif dx > freighter.x_speed:
+        held |= replay.HOLD_RIGHT
+    else:
+        game.input(replay.INPUT_STOP_X)
+    if dy < -freighter.y_speed:
+        held |= replay.HOLD_UP
+    elif dy > freighter.y_speed:
+        held |= replay.HOLD_DOWN
+    else:
+        game.input(replay.INPUT_STOP_Y)
+    if held:
+        game.input(replay.INPUT_HOLD | held)
+
+
+PILOTS = {
+    "auto": auto_pilot,
+    "idle": idle_pilot,
+}
+
+
+def load_pilot(name):
+    """Returns a built-in pilot by name, or a scripted one given as module:function."""
+    if name in PILOTS:
+        return PILOTS[name]
+    module_name, _, function_name = name.partition(":")
+    if not function_name:
+        raise ValueError(f"unknown pilot {name!r}; use one of {', '.join(PILOTS)} or module:function")
+    return getattr(importlib.import_module(module_name), function_name)
@@ -0,0 +1,231 @@
+"""
+Builds sweep tasks from config overrides and runs them in worker processes.
+"""
+
+import ast
+import os
+import random
+import time
+
+import config
+
+
+# Columns of the per-level table, after one column per swept setting
+RESULT_COLUMNS = ("run", "seed", "level", "result", "seconds", "crates",
+                  "rocks_destroyed", "tick_ms_mean", "tick_ms_p95")
+
+# Game seconds a run waits after clearing a level for the explosion cascade
+# to finish and the pilot to continue; a run still waiting ends without a row
+CONTINUE_SECONDS = 120
+
+
+def parse_value(name, text):
+    """Converts text to the type of the config setting it overrides."""
+    if not hasattr(config, name):
+        raise ValueError(f"config has no setting {name}")
+    current = getattr(config, name)
+    if isinstance(current, bool):
+        if text.lower() in ("1", "true", "yes", "on"):
+            return True
+        if text.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"{name} needs true or false, not {text!r}")
+    if isinstance(current, int):
+        return int(text)
+    if isinstance(current, float):
+        return float(text)
+    if isinstance(current, str):
+        return text
+    return ast.literal_eval(text)
+
+
+def parse_grid(specs):
+    """Parses NAME=v1,v2,... specs into {name: [values]}."""
+    grid = {}
+    for spec in specs:
+        name, _, values = spec.partition("=")
+        grid[name] = [parse_value(name, value) for value in values.split(",")]
+    return grid
+
+
+def parse_ranges(specs):
+    """Parses NAME=lo:hi specs into {name: (lo, hi)}, typed like the setting."""
+    ranges = {}
+    for spec in specs:
+        name, _, bounds = spec.partition("=")
+        lo, _, hi = bounds.partition(":")
+        ranges[name] = (parse_value(name, lo), parse_value(name, hi))
+    return ranges
+
+
+def grid_points(grid):
+    """Returns every combination of the grid's values as a list of dicts."""
+    points = [{}]
+    for name, values in grid.items():
+        points = [dict(point, **{name: value}) for point in points for value in values]
+    return points
+
+
+def sample_points(grid, ranges, samples, rng):
+    """
+    Returns samples points, each a random grid value per grid setting and a
+    uniform draw within each range (whole numbers for int settings).
+    """
+    points = []
+    for _ in range(samples):
+        point = {name: rng.choice(values) for name, values in grid.items()}
+        for name, (lo, hi) in ranges.items():
+            if isinstance(lo, int) and isinstance(hi, int):
+                point[name] = rng.randint(lo, hi)
+            else:
+                point[name] = round(rng.uniform(lo, hi), 4)
+        points.append(point)
+    return points
+
+
+def build_tasks(points, repeats, seed, pilot, max_level, level_seconds):
+    """Returns one task per point and repeat, each with its own seed."""
+    seeds = random.Random(seed)
+    tasks = []
+    for point in points:
+        for _ in range(repeats):
+            tasks.append({
+                "run": len(tasks),
+                "overrides": point,
+                "seed": seeds.getrandbits(63),
+                "pilot": pilot,
+                "max_level": max_level,
+                "level_seconds": level_seconds,
+            })
+    return tasks
+
+
+def init_worker():
+    """Runs once in each worker process before any task."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+
+def _level_row(task, level, result, ticks, crates, rocks, costs):
+    costs = sorted(costs)
+    return {
+        "run": task["run"],
+        "seed": task["seed"],
+        "level": level,
+        "result": result,
+        "seconds": round(ticks / config.SIM_TICK_RATE, 3),
+        "crates": crates,
+        "rocks_destroyed": rocks,
+        "tick_ms_mean": round(sum(costs) / len(costs), 4) if costs else 0.0,
+        "tick_ms_p95": round(costs[int(0.95 * (len(costs) - 1))], 4) if costs else 0.0,
+    }
+
+
+def run_task(task):
+    """
+    Plays one windowless game with the task's overrides, seed and pilot.
+    Returns (task, rows) with one row per level reached: cleared, lost or
+    timeout, with time spent, crates collected, rocks shot down and the
+    cost of a simulation tick.
+    """
+    import pygame
+    from game import Game
+    from sweep.pilot import load_pilot
+
+    saved = {name: getattr(config, name) for name in task["overrides"]}
+    for name, value in task["overrides"].items():
+        setattr(config, name, value)
+    try:
+        game = Game(headless=True, seed=task["seed"])
+        pilot = load_pilot(task["pilot"])
+        limit = int(task["level_seconds"] * config.SIM_TICK_RATE)
+        continue_limit = CONTINUE_SECONDS * config.SIM_TICK_RATE
+        rows = []
+
+        level = game.level
+        in_level = True
+        start_tick = game.tick_count
+        start_crates = game.crates_collected
+        start_rocks = game.rocks_destroyed
+        cleared_tick = 0
+        costs = []
+        while True:
+            if not in_level and not game.you_win:
+                # The pilot continued to the next level
+                level = game.level
+                in_level = True
+                start_tick = game.tick_count
+                start_crates = game.crates_collected
+                start_rocks = game.rocks_destroyed
+                costs = []
+
+            pilot(game)
+            began = time.perf_counter()
+            game.tick()
+            game.voices.flush()
+            if not in_level:
+                # Waiting between levels; the cleared level already has its row
+                if game.tick_count - cleared_tick >= continue_limit:
+                    break
+                continue
+            costs.append((time.perf_counter() - began) * 1000)
+
+            result = None
+            if game.you_lose:
+                result = "lost"
+            elif game.you_win:
+                result = "cleared"
+            elif game.tick_count - start_tick >= limit:
+                result = "timeout"
+            if result is not None:
+                rows.append(_level_row(task, level, result, game.tick_count - start_tick,
+                                       game.crates_collected - start_crates,
+                                       game.rocks_destroyed - start_rocks, costs))
+                in_level = False
+                cleared_tick = game.tick_count
+                if result != "cleared" or game.you_win_game or level >= task["max_level"]:
+                    break
+
+        game.loads.wait_for_audio()
+        pygame.quit()
+        return task, rows
+    finally:
+        for name, value in saved.items():
+            setattr(config, name, value)
+
+
+def summarize(table, names):
+    """
+    Groups the per-level table by swept settings and level, returning rows
+    of run counts, clear rate and mean results.
+    """
+    groups = {}
+    for row in table:
+        key = tuple(row[name] for name in names) + (row["level"],)
+        groups.setdefault(key, []).append(row)
+    summary = []
+    for key in sorted(groups, key=repr):
+        rows = groups[key]
+        count = len(rows)
+        summary.append(dict(
+            zip(names + ["level"], key),
+            runs=count,
+            cleared=round(sum(row["result"] == "cleared" for row in rows) / count, 3),
+            seconds=round(sum(row["seconds"] for row in rows) / count, 2),
+            crates=round(sum(row["crates"] for row in rows) / count, 2),
+            rocks_destroyed=round(sum(row["rocks_destroyed"] for row in rows) / count, 2),
+            tick_ms=round(sum(row["tick_ms_mean"] for row in rows) / count, 4),
+        ))
+    return summary
+
+
+def format_table(rows):
+    """Returns a list of dicts as aligned text columns."""
+    if not rows:
+        return "(no results)"
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    lines = ["  ".join(column.rjust(widths[column]) for column in columns)]
+    for row in rows:
+        lines.append("  ".join(str(row[column]).rjust(widths[column]) for column in columns))
+    return "\n".join(lines)
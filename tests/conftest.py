@@ -0,0 +1,12 @@
+"""
+Shared setup for the tests: the game modules live at the top of the repo,
+and nothing opens a window or an audio device.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pygame
+import pytest
+
+import capture
+from capture import FrameCapture, read_capture
+
+
+@pytest.fixture
+def display():
+    pygame.display.init()
+    yield pygame.display.set_mode((64, 48))
+    pygame.display.quit()
+
+
+class GatedFile:
+    """File whose writes wait until opened is set, holding the writer thread."""
+
+    def __init__(self, file):
+        self.file = file
+        self.opened = threading.Event()
+
+    def write(self, data):
+        self.opened.wait()
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def fill(surface, frame):
+    surface.fill((frame * 40 % 256, 20, 200 - frame))
+    surface.fill((255, 255, 255), (frame, frame, 4, 4))
+
+
+@pytest.mark.parametrize("level", [0, 1])
+def test_frames_read_back_with_size_and_metadata(tmp_path, display, level):
+    path = tmp_path / "run.frcp"
+    frame_capture = FrameCapture(path, display, 4, level, 60)
+    expected = []
+    for frame in range(5):
+        fill(display, frame)
+        expected.append(bytes(display.get_buffer()))
+        assert frame_capture.grab(display, frame, frame * 3, 1.5 * frame)
+        # Leave the writer time so nothing is dropped
+        while frame_capture.written < frame + 1:
+            time.sleep(0.001)
+    frame_capture.close()
+    assert frame_capture.written == frame_capture.captured == 5
+
+    frames = list(read_capture(path))
+    assert [f.frame for f in frames] == list(range(5))
+    assert [f.tick for f in frames] == [0, 3, 6, 9, 12]
+    assert [f.latency for f in frames] == pytest.approx([0.0, 1.5, 3.0, 4.5, 6.0])
+    seconds = [f.seconds for f in frames]
+    assert seconds == sorted(seconds)
+    header = frames[0].header
+    assert (header.width, header.height) == display.get_size()
+    assert header.pitch == display.get_pitch()
+    assert header.bytesize == display.get_bytesize()
+    assert header.masks == display.get_masks()
+    assert (header.level, header.tick_rate) == (level, 60)
+    for captured, pixels in zip(frames, expected):
+        assert captured.pixels == pixels
+        surface = captured.surface()
+        assert surface.get_size() == display.get_size()
+        assert bytes(surface.get_buffer()) == pixels
+
+
+def test_drops_are_counted_when_the_ring_is_full(tmp_path, display, capsys):
+    path = tmp_path / "run.frcp"
+    frame_capture = FrameCapture(path, display, 2, 0, 60)
+    gate = GatedFile(frame_capture.file)
+    frame_capture.file = gate
+    results = [frame_capture.grab(display, frame, frame, 0.0) for frame in range(5)]
+    assert results == [True, True, False, False, False]
+    assert (frame_capture.captured, frame_capture.dropped) == (2, 3)
+
+    gate.opened.set()
+    frame_capture.close()
+    assert frame_capture.written == 2
+    assert [f.frame for f in read_capture(path)] == [0, 1]
+    assert "dropped 3 frames" in capsys.readouterr().out
+
+
+def test_cut_short_capture_stops_at_last_whole_frame(tmp_path, display):
+    path = tmp_path / "run.frcp"
+    frame_capture = FrameCapture(path, display, 2, 0, 60)
+    for frame in range(2):
+        frame_capture.grab(display, frame, frame, 0.0)
+    frame_capture.close()
+    data = path.read_bytes()
+    path.write_bytes(data[:-10])
+    assert [f.frame for f in read_capture(path)] == [0]
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "run.frcp"
+    path.write_bytes(b"FRIN" + bytes(capture.HEADER.size))
+    with pytest.raises(ValueError, match="not a frame capture"):
+        list(read_capture(path))
@@ -0,0 +1,110 @@
+from entities import EntityStore
+
+
+class Entity:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Entity({self.name!r})"
+
+
+def make_store(count):
+    store = EntityStore()
+    entities = [Entity(i) for i in range(count)]
+    handles = [store.add(entity) for entity in entities]
+    return store, entities, handles
+
+
+def test_handle_refers_to_its_entity():
+    store, entities, handles = make_store(3)
+    for entity, handle in zip(entities, handles):
+        assert store.get(handle) is entity
+        assert store.handle(entity) == handle
+
+
+def test_handle_goes_stale_on_release():
+    store, entities, handles = make_store(3)
+    store.remove(entities[1])
+    assert store.get(handles[1]) is None
+    assert entities[1] not in store
+    assert store.get(handles[0]) is entities[0]
+    assert store.get(handles[2]) is entities[2]
+
+
+def test_stale_handle_does_not_see_slot_reuse():
+    store, entities, handles = make_store(3)
+    store.remove(entities[1])
+    newcomer = Entity("new")
+    handle = store.add(newcomer)
+    # The freed slot is taken over under a new generation
+    assert handle[0] == handles[1][0]
+    assert handle[1] != handles[1][1]
+    assert store.get(handles[1]) is None
+    assert store.get(handle) is newcomer
+
+
+def test_clear_invalidates_every_handle():
+    store, entities, handles = make_store(4)
+    store.clear()
+    assert not store
+    assert all(store.get(handle) is None for handle in handles)
+
+
+def test_removal_during_iteration_defers_compaction():
+    store, entities, handles = make_store(6)
+    seen = []
+    for entity in store:
+        seen.append(entity)
+        if entity.name % 2:
+            store.remove(entity)
+        # Holes stay open until the loop is over
+        assert len(store.items) == 6
+    assert seen == entities
+    assert store.items == entities[::2]
+    assert store.holes == 0
+
+
+def test_live_handles_survive_compaction():
+    store, entities, handles = make_store(8)
+    for entity in entities[:5:2]:
+        store.remove(entity)
+    store.compact()
+    for entity, handle in zip(entities, handles):
+        if entity in store:
+            assert store.get(handle) is entity
+            assert store.handle(entity) == handle
+            assert store[store.position[entity]] is entity
+        else:
+            assert store.get(handle) is None
+
+
+def test_indexing_compacts_and_keeps_order():
+    store, entities, handles = make_store(5)
+    store.remove(entities[0])
+    store.remove(entities[3])
+    assert store[0] is entities[1]
+    assert store.holes == 0
+    assert list(store) == [entities[1], entities[2], entities[4]]
+    assert len(store) == 3
+
+
+def test_indexing_during_iteration_skips_holes():
+    store, entities, handles = make_store(4)
+    for entity in store:
+        if entity is entities[0]:
+            store.remove(entity)
+            assert store[0] is entities[1]
+            assert store.holes == 1
+
+
+def test_entities_added_during_iteration_wait_for_next_loop():
+    store, entities, handles = make_store(2)
+    late = Entity("late")
+    seen = []
+    for entity in store:
+        seen.append(entity)
+        if late not in store:
+            store.add(late)
+    assert seen == entities
+    assert list(store) == entities + [late]
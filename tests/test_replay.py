@@ -0,0 +1,110 @@
+import struct
+
+import pytest
+
+import replay
+from game import Game
+
+
+SEED = 1234
+
+
+def write_recording(path, entries, end_tick):
+    recorder = replay.InputRecorder(path, replay.RecordingHeader(SEED, 60, 640, 480))
+    for tick, code in entries:
+        recorder.record(tick, code)
+    recorder.close(end_tick)
+
+
+@pytest.mark.parametrize("delta", [0, 1, 127, 128, 129, 255, 16383, 16384, 2_000_000])
+def test_varint_tick_deltas_round_trip(tmp_path, delta):
+    path = tmp_path / "run.frin"
+    entries = [(5, replay.INPUT_SHOOT), (5 + delta, replay.INPUT_STOP_X)]
+    write_recording(path, entries, 5 + delta + 300)
+    loaded = replay.InputReplay(path)
+    assert loaded.entries == entries
+    assert loaded.end_tick == 5 + delta + 300
+
+
+def test_due_hands_out_inputs_once_in_order(tmp_path):
+    path = tmp_path / "run.frin"
+    entries = [(0, replay.INPUT_HOLD | replay.HOLD_LEFT), (3, replay.INPUT_SHOOT),
+               (3, replay.INPUT_STOP_X), (200, replay.INPUT_SHOOT)]
+    write_recording(path, entries, 250)
+    loaded = replay.InputReplay(path)
+    assert loaded.due(0) == [entries[0][1]]
+    assert loaded.due(2) == []
+    assert loaded.due(3) == [replay.INPUT_SHOOT, replay.INPUT_STOP_X]
+    assert loaded.due(3) == []
+    assert loaded.due(249) == [replay.INPUT_SHOOT]
+    assert not loaded.finished(249)
+    assert loaded.finished(250)
+
+
+def test_header_round_trips(tmp_path):
+    path = tmp_path / "run.frin"
+    write_recording(path, [], 10)
+    header = replay.read_header(path)
+    assert (header.seed, header.tick_rate, header.width, header.height) == (SEED, 60, 640, 480)
+
+
+def test_bad_magic_is_rejected(tmp_path):
+    path = tmp_path / "run.frin"
+    path.write_bytes(replay.HEADER.pack(b"NOPE", replay.VERSION, SEED, 60, 640, 480))
+    with pytest.raises(ValueError, match="not an input recording"):
+        replay.read_header(path)
+
+
+def test_other_version_is_rejected(tmp_path):
+    path = tmp_path / "run.frin"
+    path.write_bytes(replay.HEADER.pack(replay.MAGIC, replay.VERSION + 1, SEED, 60, 640, 480))
+    with pytest.raises(ValueError, match="version"):
+        replay.InputReplay(path)
+
+
+def test_short_header_is_rejected(tmp_path):
+    path = tmp_path / "run.frin"
+    path.write_bytes(struct.pack("<4s", replay.MAGIC))
+    with pytest.raises(ValueError):
+        replay.read_header(path)
+
+
+def game_state(game):
+    freighter = game.freighter
+    return (game.tick_count, game.level, tuple(freighter.rect), freighter.hp,
+            game.crates_collected, game.rocks_destroyed, len(game.rockbox),
+            len(game.laserbox), game.rng.getstate())
+
+
+def test_replay_reproduces_a_seeded_run(tmp_path):
+    path = tmp_path / "run.frin"
+    moves = [replay.INPUT_HOLD | replay.HOLD_LEFT | replay.HOLD_UP,
+             replay.INPUT_SHOOT,
+             replay.INPUT_STOP_X,
+             replay.INPUT_HOLD | replay.HOLD_RIGHT,
+             replay.INPUT_SHOOT,
+             replay.INPUT_STOP_Y]
+
+    game = Game(headless=True, seed=SEED)
+    game.start_recording(path)
+    for step in range(600):
+        if step % 7 == 0:
+            game.input(moves[step // 7 % len(moves)])
+        game.tick()
+    game.recorder.close(game.tick_count)
+    recorded = game_state(game)
+
+    game = Game(headless=True, seed=SEED)
+    game.start_replay(path)
+    while not game.replay_finished():
+        game.tick()
+    assert game_state(game) == recorded
+
+
+def test_replay_needs_the_recording_seed(tmp_path):
+    path = tmp_path / "run.frin"
+    game = Game(headless=True, seed=SEED)
+    game.start_recording(path)
+    game.recorder.close(0)
+    with pytest.raises(ValueError, match="seed"):
+        Game(headless=True, seed=SEED + 1).start_replay(path)
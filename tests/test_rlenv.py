@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from rlenv import FreighterEnv
+
+
+def play(env, seed, steps=120):
+    observations = [env.reset(seed=seed)[0].copy()]
+    for step in range(steps):
+        # Moving and firing, so there are explosions and particles
+        observations.append(env.step(9 + step % 9)[0].copy())
+    return observations
+
+
+@pytest.mark.parametrize("obs", ["features", "pixels"])
+def test_reset_with_a_seed_replays_the_episode(obs):
+    env = FreighterEnv(obs, seed=1)
+    play(env, 3)
+    first = play(env, 7)
+    second = play(env, 7)
+    fresh = play(FreighterEnv(obs, seed=2), 7)
+    for a, b, c in zip(first, second, fresh):
+        assert np.array_equal(a, b)
+        assert np.array_equal(a, c)
@@ -0,0 +1,116 @@
+"""
+Mixer voice manager: channel groups per sound category, repeat limiting,
+merging of simultaneous triggers and priority-based dropping.
+"""
+
+import pygame
+import config
+
+
+class VoiceManager:
+    """
+    Plays sound effects on channels reserved per category.
+
+    Requests made during a frame are queued and played together by flush,
+    so several triggers of the same sound in one frame become one louder
+    voice. A sound that already started within SOUND_REPEAT_WINDOW
+    milliseconds is not started again; the voice that is playing gets louder
+    instead. When a category's channels are all busy, the sound takes a
+    channel from a lower-priority category or is dropped.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.groups = None
+        self.priorities = {name: priority for name, (_, priority) in config.SOUND_CHANNELS.items()}
+        self.pending = {}
+        self.last_voice = {}
+
+        # Counts for the last flushed frame
+        self.played = 0
+        self.merged = 0
+        self.dropped = 0
+        self.total_played = 0
+        self.total_dropped = 0
+
+    def _reserve_channels(self):
+        """Splits the mixer's channels into one group per category."""
+        total = sum(channels for channels, _ in config.SOUND_CHANNELS.values())
+        pygame.mixer.set_num_channels(total)
+        pygame.mixer.set_reserved(total)
+        self.groups = {}
+        index = 0
+        for name, (channels, _) in config.SOUND_CHANNELS.items():
+            self.groups[name] = [pygame.mixer.Channel(index + i) for i in range(channels)]
+            index += channels
+
+    def play(self, sound, category, volume=1.0):
+        """Queues a sound to start at the end of this frame."""
+        if sound is None:
+            return
+        request = self.pending.get(sound)
+        if request is None:
+            self.pending[sound] = [category, volume, 1]
+        else:
+            request[1] = max(request[1], volume)
+            request[2] += 1
+
+    def flush(self):
+        """Starts the sounds queued this frame and updates the counts."""
+        self.played = self.merged = self.dropped = 0
+        if not self.pending:
+            return
+        if self.groups is None:
+            if not pygame.mixer.get_init():
+                # Mixer not started yet, or no audio device
+                self.dropped = len(self.pending)
+                self.total_dropped += self.dropped
+                self.pending.clear()
+                return
+            self._reserve_channels()
+
+        now = self.game.get_time()
+        # Higher priorities pick channels first
+        requests = sorted(self.pending.items(), key=lambda item: -self.priorities[item[1][0]])
+        self.pending.clear()
+        for sound, (category, volume, count) in requests:
+            self.merged += count - 1
+            volume = min(1.0, volume * (1.0 + config.SOUND_MERGE_GAIN * (count - 1)))
+
+            # Same sound started moments ago: make that voice louder instead
+            last = self.last_voice.get(sound)
+            if last is not None and now - last[1] < config.SOUND_REPEAT_WINDOW:
+                channel = last[0]
+                if channel.get_sound() is sound:
+                    channel.set_volume(min(1.0, channel.get_volume() + volume * config.SOUND_MERGE_GAIN))
+                self.merged += 1
+                continue
+
+            channel = self._find_channel(category)
+            if channel is None:
+                self.dropped += 1
+                continue
+            channel.play(sound)
+            channel.set_volume(volume)
+            self.last_voice[sound] = (channel, now)
+            self.played += 1
+        self.total_played += self.played
+        self.total_dropped += self.dropped
+
+    def _find_channel(self, category):
+        """
+        Returns a free channel in the category's group, else a busy channel
+        taken from the lowest-priority category below it, else None.
+        """
+        for channel in self.groups[category]:
+            if not channel.get_busy():
+                return channel
+        priority = self.priorities[category]
+        lower = sorted((name for name, other in self.priorities.items() if other < priority),
+                       key=self.priorities.__getitem__)
+        for name in lower:
+            for channel in self.groups[name]:
+                if channel.get_busy():
+                    channel.stop()
+                    return channel
+        return None